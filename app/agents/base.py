@@ -3,8 +3,10 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional, Union, AsyncGenerator
 import logging
+import re
 import uuid
 import asyncio
+from collections import deque
 from datetime import datetime
 
 from app.models.agent import Agent
@@ -15,6 +17,15 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Indicadores de fatos, compilados numa única alternância para busca em uma passada
+FACT_INDICATORS = [
+    "é", "são", "foi", "foram", "consiste", "significa",
+    "define", "representa", "contém", "inclui", "exclui",
+    "maior", "menor", "importante", "essencial", "crítico"
+]
+_FACT_INDICATOR_PATTERN = re.compile("|".join(re.escape(ind) for ind in FACT_INDICATORS))
+MAX_FACTS_PER_TEXT = 5
+
 class AgentState:
     """
     Classe aprimorada para gerenciar o estado interno de um agente.
@@ -31,11 +42,15 @@ class AgentState:
     COMPLETED = "completed"
     TIMED_OUT = "timed_out"
     
+    # Limites da memória de curto prazo (entradas antigas são descartadas)
+    MAX_FACTS = 20
+    MAX_RECENT_ACTIONS = 10
+    
     def __init__(self):
         self.context: Dict[str, Any] = {}
         self.memory: Dict[str, Any] = {
-            "facts": [],
-            "recent_actions": [],
+            "facts": deque(maxlen=self.MAX_FACTS),
+            "recent_actions": deque(maxlen=self.MAX_RECENT_ACTIONS),
             "priorities": {}
         }
         self.status: str = self.READY
@@ -111,16 +126,16 @@ class AgentState:
             **action,
             "timestamp": datetime.utcnow().isoformat()
         })
-        
-        # Manter apenas as últimas 10 ações
-        if len(self.memory["recent_actions"]) > 10:
-            self.memory["recent_actions"] = self.memory["recent_actions"][-10:]
     
     def get_context(self) -> Dict[str, Any]:
         """Obtém o contexto atual do estado."""
         return {
             "status": self.status,
-            "memory": self.memory,
+            "memory": {
+                **self.memory,
+                "facts": list(self.memory["facts"]),
+                "recent_actions": list(self.memory["recent_actions"])
+            },
             "last_update": self.last_update.isoformat(),
             "is_alive": self.is_alive(),
             "can_process": self.can_process_request(),
@@ -433,19 +448,12 @@ class BaseAgent(ABC):
         if not text or not text.strip():
             return facts
         
-        # Dividir por frases e filtrar
-        sentences = [s.strip() for s in text.split(".") if len(s.strip()) > 10]
-        
-        # Procurar por indicadores de fatos
-        indicators = [
-            "é", "são", "foi", "foram", "consiste", "significa",
-            "define", "representa", "contém", "inclui", "exclui",
-            "maior", "menor", "importante", "essencial", "crítico"
-        ]
-        
-        for sentence in sentences:
-            # CORREÇÃO: Verificar se a sentença não está vazia
-            if sentence and any(ind in sentence.lower() for ind in indicators):
+        # Percorrer as frases e parar assim que o limite de fatos for atingido
+        for sentence in text.split("."):
+            sentence = sentence.strip()
+            if len(sentence) > 10 and _FACT_INDICATOR_PATTERN.search(sentence.lower()):
                 facts.append(sentence)
+                if len(facts) >= MAX_FACTS_PER_TEXT:
+                    break
         
-        return facts[:5]  # Limitar a 5 fatos por processamento
\ No newline at end of file
+        return facts
\ No newline at end of file
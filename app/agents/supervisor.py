@@ -12,6 +12,31 @@ from app.models.message import Message, MessageRole
 
 logger = logging.getLogger(__name__)
 
+# Palavras-chave usadas para rotear mensagens quando o LLM não indica o departamento
+DEPARTMENT_KEYWORDS: Dict[str, List[str]] = {
+    "marketing": ["marketing", "publicidade", "campanha", "redes sociais", "marca", "branding", 
+                "público-alvo", "divulgação", "comunicação", "mídia", "propaganda", "anúncio", 
+                "conteúdo", "site", "blog", "engajamento", "alcance"],
+    
+    "sales": ["vendas", "cliente", "proposta", "negociação", "desconto", "preço", "cotação", 
+            "compra", "vender", "oportunidade", "lead", "pipeline", "funil", "conversão", 
+            "prospectar", "contrato", "fechar"],
+    
+    "finance": ["financeiro", "orçamento", "custo", "pagamento", "fatura", "receita", "despesa", 
+            "contabilidade", "investimento", "ROI", "lucro", "prejuízo", "balanço", "fiscal", 
+            "imposto", "tributo", "demonstrativo", "fluxo de caixa"]
+}
+
+# Mapa palavra-chave -> departamento e alternância única compilada uma vez
+_KEYWORD_DEPARTMENT: Dict[str, str] = {
+    word.lower(): dept
+    for dept, words in DEPARTMENT_KEYWORDS.items()
+    for word in words
+}
+_KEYWORD_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(word) for word in sorted(_KEYWORD_DEPARTMENT, key=len, reverse=True)) + r")\b"
+)
+
 class SupervisorAgent(BaseAgent):
     """
     Agente supervisor responsável por coordenar outros agentes,
@@ -157,27 +182,15 @@ class SupervisorAgent(BaseAgent):
                 if department and department in self.department_agents:
                     return department
         
-        # Análise de palavras-chave se o LLM não especificou
-        keywords = {
-            "marketing": ["marketing", "publicidade", "campanha", "redes sociais", "marca", "branding", 
-                        "público-alvo", "divulgação", "comunicação", "mídia", "propaganda", "anúncio", 
-                        "conteúdo", "site", "blog", "engajamento", "alcance"],
-            
-            "sales": ["vendas", "cliente", "proposta", "negociação", "desconto", "preço", "cotação", 
-                    "compra", "vender", "oportunidade", "lead", "pipeline", "funil", "conversão", 
-                    "prospectar", "contrato", "fechar"],
-            
-            "finance": ["financeiro", "orçamento", "custo", "pagamento", "fatura", "receita", "despesa", 
-                    "contabilidade", "investimento", "ROI", "lucro", "prejuízo", "balanço", "fiscal", 
-                    "imposto", "tributo", "demonstrativo", "fluxo de caixa"]
-        }
+        # Análise de palavras-chave numa única passada sobre a mensagem
+        scores = {dept: 0 for dept in DEPARTMENT_KEYWORDS}
         
-        # Contar ocorrências de palavras-chave
-        scores = {dept: 0 for dept in keywords}
+        for match in _KEYWORD_PATTERN.finditer(message.lower()):
+            scores[_KEYWORD_DEPARTMENT[match.group(0)]] += 1
         
-        for dept, words in keywords.items():
-            for word in words:
-                scores[dept] += len(re.findall(rf'\b{word}\b', message.lower()))
+        # Nenhuma palavra-chave encontrada: não há pesos a aplicar
+        if not any(scores.values()):
+            return "custom"
         
         # Aplicar pesos contextuais baseados na frequência de termos relacionados
         message_tokens = message.lower().split()
@@ -49,6 +49,14 @@ class MetricsResponse(BaseModel):
     success_rate: float
     avg_latency: float
 
+class ModelsResponse(BaseModel):
+    models: List[Dict[str, Any]]
+    default_model: Optional[str] = None
+
+class RateLimitResetResponse(BaseModel):
+    message: str
+    user_id: Any
+
 # Endpoint para geração de texto
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_text(
@@ -270,7 +278,7 @@ async def get_model_metrics(
         )
 
 # Endpoint para listar modelos disponíveis
-@router.get("/models")
+@router.get("/models", response_model=ModelsResponse)
 async def list_models(
     current_user: User = Depends(get_current_active_user)
 ):
@@ -294,10 +302,10 @@ async def list_models(
             model_id = model["model_id"]
             model["available"] = rate_limits.get(model_id, True)
         
-        return {
-            "models": models,
-            "default_model": smart_router.router.default_model
-        }
+        return ModelsResponse(
+            models=models,
+            default_model=smart_router.router.default_model
+        )
         
     except Exception as e:
         logger.error(f"Erro ao listar modelos: {str(e)}")
@@ -307,7 +315,7 @@ async def list_models(
         )
 
 # Endpoint para resetar rate limit
-@router.post("/reset-rate-limit")
+@router.post("/reset-rate-limit", response_model=RateLimitResetResponse)
 async def reset_rate_limit(
     current_user: User = Depends(get_current_active_user)
 ):
@@ -328,10 +336,10 @@ async def reset_rate_limit(
                 category=category
             )
         
-        return {
-            "message": "Rate limits resetados com sucesso",
-            "user_id": current_user.id
-        }
+        return RateLimitResetResponse(
+            message="Rate limits resetados com sucesso",
+            user_id=current_user.id
+        )
         
     except Exception as e:
         logger.error(f"Erro ao resetar rate limit: {str(e)}")
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -11,6 +11,7 @@ class Settings(BaseSettings):
     LLAMA_MODEL_PATH: str = ""
     LLAMA_N_CTX: int = 4096
     LLAMA_N_GPU_LAYERS: int = -1
+    LLAMA_N_BATCH: int = 512
     LLAMA_VERBOSE: bool = False
     
     MISTRAL_API_KEY: str = ""
@@ -26,6 +27,10 @@ class Settings(BaseSettings):
     # LLM Server settings - Properly integrated into the class
     LLM_SERVER_URL: str = "http://192.168.15.35:8000"
     LLM_SERVER_TIMEOUT: int = 1000
+    # Segundos de espera antes de disparar uma requisição de hedge (None desativa)
+    LLM_HEDGE_DELAY: Optional[float] = None
+    # Habilita o cache semântico na frente de route_generate
+    LLM_SEMANTIC_CACHE: bool = False
     
     # Security - Adicionando valor padrão para testes
     SECRET_KEY: str = "development-secret-key-change-in-production"
@@ -30,7 +30,9 @@ class Job:
         self.func = func
         self.args = args
         self.kwargs = kwargs
-        self.status = JobStatus.PENDING
+        self._status = JobStatus.PENDING
+        # Notificado a cada mudança de status (usado pela fila para as estatísticas)
+        self.on_status_change: Optional[Callable[[JobStatus, JobStatus], None]] = None
         self.result = None
         self.error = None
         self.created_at = time.time()
@@ -39,27 +41,51 @@ class Job:
         self.timeout = timeout
         self.tenant_id = tenant_id
         self.task = None
+        self.deadline: Optional[float] = None
+        self.timed_out = False
     
-    async def run(self):
-        """Executa o job."""
+    @property
+    def status(self) -> JobStatus:
+        return self._status
+    
+    @status.setter
+    def status(self, value: JobStatus):
+        previous, self._status = self._status, value
+        if self.on_status_change and previous != value:
+            self.on_status_change(previous, value)
+    
+    async def run(self, enforce_timeout: bool = True):
+        """
+        Executa o job.
+        
+        Args:
+            enforce_timeout: Se o próprio job deve armar seu timer de timeout.
+                A BackgroundJobQueue passa False e expira os jobs pela sua
+                roda de timers (ver expire()).
+        """
         self.status = JobStatus.RUNNING
         self.started_at = time.time()
         
         try:
-            if self.timeout:
-                # Executar com timeout
-                self.result = await asyncio.wait_for(
-                    self.func(*self.args, **self.kwargs),
-                    timeout=self.timeout
-                )
+            if self.timeout and enforce_timeout:
+                # Executar com timeout (asyncio.timeout não cria uma Task extra como wait_for)
+                async with asyncio.timeout(self.timeout):
+                    self.result = await self.func(*self.args, **self.kwargs)
             else:
-                # Executar sem timeout
+                # Executar sem timeout próprio
                 self.result = await self.func(*self.args, **self.kwargs)
             
             self.status = JobStatus.COMPLETED
         except asyncio.TimeoutError:
             self.status = JobStatus.FAILED
             self.error = "Timeout exceeded"
+        except asyncio.CancelledError:
+            if not self.timed_out:
+                raise
+            # Cancelado pela roda de timers da fila: tratar como timeout
+            asyncio.current_task().uncancel()
+            self.status = JobStatus.FAILED
+            self.error = "Timeout exceeded"
         except Exception as e:
             self.status = JobStatus.FAILED
             self.error = str(e)
@@ -82,6 +108,12 @@ class Job:
             "tenant_id": self.tenant_id
         }
     
+    def expire(self):
+        """Interrompe o job por ter excedido o prazo."""
+        if self.status == JobStatus.RUNNING and self.task and not self.task.done():
+            self.timed_out = True
+            self.task.cancel()
+    
     def cancel(self):
         """Cancela o job."""
         if self.status == JobStatus.PENDING or self.status == JobStatus.RUNNING:
@@ -89,6 +121,70 @@ class Job:
             if self.task and not self.task.done():
                 self.task.cancel()
 
+class _TimeoutWheel:
+    """
+    Roda de timers com hash para os prazos dos jobs da fila.
+    
+    Cada job entra no slot do tick do seu prazo (O(1) para adicionar e
+    remover) e uma única task acorda a cada tick para expirar os vencidos,
+    em vez de cada job manter seu próprio timer no heap do event loop. A
+    task só existe enquanto houver jobs com prazo.
+    """
+    
+    def __init__(self, slots: int = 1024, resolution: float = 0.01):
+        self.slots: List[set] = [set() for _ in range(slots)]
+        self.resolution = resolution
+        self.size = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def _tick(self, when: float) -> int:
+        return int(when / self.resolution)
+    
+    def add(self, job: Job):
+        """Agenda o prazo do job a partir de agora."""
+        loop = asyncio.get_running_loop()
+        job.deadline = loop.time() + job.timeout
+        self.slots[self._tick(job.deadline) % len(self.slots)].add(job)
+        self.size += 1
+        
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    def discard(self, job: Job):
+        """Remove o job da roda, se estiver agendado."""
+        if job.deadline is None:
+            return
+        bucket = self.slots[self._tick(job.deadline) % len(self.slots)]
+        if job in bucket:
+            bucket.remove(job)
+            self.size -= 1
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        tick = self._tick(loop.time())
+        
+        while self.size:
+            await asyncio.sleep(self.resolution)
+            now = loop.time()
+            now_tick = self._tick(now)
+            
+            # Percorrer os slots dos ticks já encerrados desde a última passada
+            # (no máximo uma volta completa); o tick atual ainda pode receber prazos
+            for current in range(max(tick, now_tick - len(self.slots)), now_tick):
+                bucket = self.slots[current % len(self.slots)]
+                expired = [job for job in bucket if job.deadline <= now]
+                for job in expired:
+                    bucket.remove(job)
+                    self.size -= 1
+                    job.expire()
+            tick = now_tick
+    
+    def stop(self):
+        """Cancela a task de ticks."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
 class BackgroundJobQueue:
     """
     Fila de jobs em background.
@@ -103,6 +199,14 @@ class BackgroundJobQueue:
             max_workers: Número máximo de workers
         """
         self.jobs: Dict[str, Job] = {}
+        # Índices mantidos a cada enqueue/mudança de status, para que consultas
+        # agregadas não precisem percorrer todos os jobs
+        self._tenant_jobs: Dict[str, List[Job]] = {}
+        self._status_counts: Dict[JobStatus, int] = {status: 0 for status in JobStatus}
+        # Jobs pendentes em ordem de chegada; o worker consome daqui em vez de
+        # varrer todos os jobs a cada iteração
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._timeouts = _TimeoutWheel()
         self.max_workers = max_workers
         self.semaphore = asyncio.Semaphore(max_workers)
         self.running = False
@@ -131,6 +235,7 @@ class BackgroundJobQueue:
                 pass
             self.worker_task = None
         
+        self._timeouts.stop()
         logger.info("Background job queue parada")
     
     async def enqueue(self, 
@@ -155,7 +260,11 @@ class BackgroundJobQueue:
             ID do job
         """
         job = Job(func, args, kwargs, timeout, tenant_id)
+        job.on_status_change = self._count_status_change
         self.jobs[job.id] = job
+        self._tenant_jobs.setdefault(tenant_id, []).append(job)
+        self._status_counts[job.status] += 1
+        self._pending.put_nowait(job)
         
         # Se a fila não estiver rodando e auto_start for True, iniciar
         if not self.running and auto_start:
@@ -189,8 +298,22 @@ class BackgroundJobQueue:
         Returns:
             Lista de informações de jobs
         """
-        return [job.to_dict() for job in self.jobs.values() 
-                if job.tenant_id == tenant_id]
+        return [job.to_dict() for job in self._tenant_jobs.get(tenant_id, [])]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Obtém a contagem de jobs por status.
+        
+        Returns:
+            Dicionário status -> quantidade, mais o total
+        """
+        stats = {status.value: count for status, count in self._status_counts.items()}
+        stats["total"] = len(self.jobs)
+        return stats
+    
+    def _count_status_change(self, previous: JobStatus, current: JobStatus):
+        self._status_counts[previous] -= 1
+        self._status_counts[current] += 1
     
     def cancel_job(self, job_id: str) -> bool:
         """
@@ -212,29 +335,23 @@ class BackgroundJobQueue:
     async def _worker_loop(self):
         """Loop principal de processamento da fila."""
         while self.running:
-            # Encontrar jobs pendentes
-            pending_jobs = [job for job in self.jobs.values() 
-                          if job.status == JobStatus.PENDING]
+            # Aguardar o próximo job pendente (sem polling)
+            job = await self._pending.get()
             
-            if not pending_jobs:
-                # Sem jobs pendentes, aguardar
-                await asyncio.sleep(0.1)
+            # Jobs cancelados enquanto aguardavam na fila são descartados
+            if job.status != JobStatus.PENDING:
                 continue
             
-            # Executar jobs pendentes (até o limite de workers)
-            for job in pending_jobs:
-                # Usar semáforo para limitar número de jobs simultâneos
-                if await self._try_acquire_semaphore():
-                    # Iniciar job em task separada
-                    job.task = asyncio.create_task(self._run_job(job))
-    
-    async def _try_acquire_semaphore(self) -> bool:
-        """Tenta adquirir o semáforo sem bloquear."""
-        if self.semaphore.locked():
-            return False
-        
-        await self.semaphore.acquire()
-        return True
+            # Usar semáforo para limitar número de jobs simultâneos
+            await self.semaphore.acquire()
+            
+            # O job pode ter sido cancelado enquanto aguardava uma vaga
+            if job.status != JobStatus.PENDING:
+                self.semaphore.release()
+                continue
+            
+            # Iniciar job em task separada
+            job.task = asyncio.create_task(self._run_job(job))
     
     async def _run_job(self, job: Job):
         """
@@ -243,9 +360,12 @@ class BackgroundJobQueue:
         Args:
             job: Job a ser executado
         """
+        if job.timeout:
+            self._timeouts.add(job)
         try:
-            await job.run()
+            await job.run(enforce_timeout=False)
         finally:
+            self._timeouts.discard(job)
             self.semaphore.release()
 
 # Singleton para acesso global
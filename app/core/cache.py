@@ -95,6 +95,23 @@ class Cache:
             logger.error(f"Erro ao excluir do cache: {str(e)}")
             return False
     
+    def pipeline(self, transaction: bool = True):
+        """
+        Cria um pipeline do Redis para enviar vários comandos numa única ida e volta.
+        
+        Os valores gravados pelo pipeline devem ser serializados com pickle,
+        no mesmo formato usado por set/get.
+        
+        Args:
+            transaction: Se True, executa os comandos em MULTI/EXEC
+            
+        Returns:
+            Pipeline do Redis, ou None se não houver conexão
+        """
+        if not self.redis:
+            return None
+        return self.redis.pipeline(transaction=transaction)
+    
     async def flush(self) -> bool:
         """
         Limpa todo o cache.
@@ -5,6 +5,13 @@ import logging
 import re
 from datetime import datetime
 
+# orjson é opcional: acelera o parse do JSON das ações quando instalado
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 from app.models.message import Message, MessageRole
 from app.models.conversation import Conversation
 from app.models.agent import Agent
@@ -14,6 +21,19 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Padrões de detecção de ações, compilados uma única vez: (regex, formato)
+_ACTION_PATTERNS = (
+    (re.compile(r'\{\s*"action"\s*:\s*"([^"]+)"\s*,\s*"params"\s*:\s*(\{.*?\})\s*\}', re.DOTALL), 'json'),
+    (re.compile(r'<action\s+name=[\'"]([^\'"]+)[\'"]>(.*?)</action>', re.DOTALL), 'xml'),
+    (re.compile(r'\[\[ACTION:([^\]]+)\]\](.*?)\[\[/ACTION\]\]', re.DOTALL), 'markdown')
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Padrões usados por _parse_params no formato chave=valor
+_PARAM_PAIR_RE = re.compile(r'(\w+)\s*=\s*([^,]+)(?:,|$)')
+_NUMBER_RE = re.compile(r'^-?\d+(\.\d+)?$')
+_QUOTED_RE = re.compile(r'^["\'](.*)["\']$')
+
 class MCPFormatter:
     """
     Componente responsável pela formatação de contexto no padrão MCP (Model Context Protocol).
@@ -345,12 +365,8 @@ class MCPResponseProcessor:
     """
     
     def __init__(self):
-        # Definir padrões para detecção de ações
-        self.action_patterns = [
-            (r'\{\s*"action"\s*:\s*"([^"]+)"\s*,\s*"params"\s*:\s*(\{.*?\})\s*\}', 'json'),
-            (r'<action\s+name=[\'"]([^\'"]+)[\'"]>(.*?)</action>', 'xml'),
-            (r'\[\[ACTION:([^\]]+)\]\](.*?)\[\[/ACTION\]\]', 'markdown')
-        ]
+        # Definir padrões (já compilados) para detecção de ações
+        self.action_patterns = list(_ACTION_PATTERNS)
         
         # Definir termos sensíveis para filtragem
         self.sensitive_terms = [
@@ -411,7 +427,7 @@ class MCPResponseProcessor:
         
         # Procurar por padrões de ação
         for pattern, format_type in self.action_patterns:
-            matches = re.finditer(pattern, text, re.DOTALL)
+            matches = pattern.finditer(text)
             
             for match in matches:
                 try:
@@ -419,7 +435,7 @@ class MCPResponseProcessor:
                         action_name = match.group(1)
                         params_json = match.group(2)
                         try:
-                            params = json.loads(params_json)
+                            params = _json_loads(params_json)
                         except json.JSONDecodeError:
                             params = {"raw": params_json}
                     
@@ -453,7 +469,7 @@ class MCPResponseProcessor:
                     logger.warning(f"Erro ao extrair ação: {str(e)}")
         
         # Limpar espaços em branco extras
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
+        cleaned_text = _WHITESPACE_RE.sub(' ', cleaned_text).strip()
         
         return actions, cleaned_text
     
@@ -471,13 +487,12 @@ class MCPResponseProcessor:
         
         # Tentar JSON primeiro
         try:
-            return json.loads(params_text)
+            return _json_loads(params_text)
         except:
             pass
         
         # Tentar formato chave=valor
-        pairs = re.findall(r'(\w+)\s*=\s*([^,]+)(?:,|$)', params_text)
-        for key, value in pairs:
+        for key, value in _PARAM_PAIR_RE.findall(params_text):
             # Tentar converter para o tipo apropriado
             value = value.strip()
             if value.lower() == 'true':
@@ -486,11 +501,11 @@ class MCPResponseProcessor:
                 params[key] = False
             elif value.isdigit():
                 params[key] = int(value)
-            elif re.match(r'^-?\d+(\.\d+)?$', value):
+            elif _NUMBER_RE.match(value):
                 params[key] = float(value)
             else:
                 # Remover aspas se presentes
-                params[key] = re.sub(r'^["\'](.*)["\']$', r'\1', value)
+                params[key] = _QUOTED_RE.sub(r'\1', value)
         
         if not params:
             params["text"] = params_text.strip()
@@ -2,7 +2,7 @@
 import time
 import logging
 import asyncio
-from typing import Dict, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 from redis.asyncio import Redis
 import redis.asyncio as redis
 from app.config import settings
@@ -10,6 +10,40 @@ from app.core.cache import get_cache
 
 logger = logging.getLogger(__name__)
 
+# Script Lua que registra N solicitações de uma vez na mesma janela do check_rate_limit
+# (hash com "count" e "reset_at"), de forma atômica e com uma única ida ao Redis.
+# Retorna {{permitido, restantes}, ...} e o reset_at como string (Lua trunca floats).
+RATE_LIMIT_BATCH_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local n = tonumber(ARGV[4])
+
+local data = redis.call('HMGET', KEYS[1], 'count', 'reset_at')
+local count = tonumber(data[1]) or 0
+local reset_at = tonumber(data[2])
+
+if not reset_at or reset_at < now then
+    count = 0
+    reset_at = now + period
+end
+
+local results = {}
+for i = 1, n do
+    count = count + 1
+    if count <= limit then
+        results[i] = {1, limit - count}
+    else
+        results[i] = {0, 0}
+    end
+end
+
+redis.call('HSET', KEYS[1], 'count', count, 'reset_at', tostring(reset_at))
+redis.call('EXPIRE', KEYS[1], period)
+
+return {results, tostring(reset_at)}
+"""
+
 class RateLimiter:
     """
     Implementação de limitação de taxa usando Redis.
@@ -27,6 +61,7 @@ class RateLimiter:
         """
         self.redis_url = redis_url or settings.REDIS_URL
         self.redis: Optional[Redis] = None
+        self._batch_script = None
         self._connect()
     
     def _connect(self) -> None:
@@ -85,6 +120,8 @@ class RateLimiter:
                 # Extrair o contador e o timestamp
                 current_count = results[0][0]
                 reset_at = results[0][1]
+                # Contador já incluindo esta solicitação (mesma regra do check_rate_limit_batch)
+                new_count = results[1]
                 
                 # Se não existir contador ou o timestamp expirou, reiniciar
                 if not current_count or not reset_at or float(reset_at) < now:
@@ -104,10 +141,10 @@ class RateLimiter:
                     return True, {"remaining": limit - 1, "reset": reset_at}
                 
                 # Converter strings para valores apropriados
-                current_count = int(current_count)
+                current_count = int(new_count)
                 reset_at = float(reset_at)
                 
-                # Verificar se o limite foi atingido
+                # Verificar se o limite foi atingido (no máximo `limit` por janela)
                 is_allowed = current_count <= limit
                 remaining = max(0, limit - current_count)
                 
@@ -126,6 +163,64 @@ class RateLimiter:
             # Em caso de erro, permitimos a solicitação
             return True, {"remaining": 999, "reset": time.time() + period}
     
+    async def check_rate_limit_batch(
+        self,
+        key: str,
+        limit: int = 10,
+        period: int = 60,
+        category: str = "default",
+        n: int = 1
+    ) -> List[Tuple[bool, Dict[str, Union[int, float]]]]:
+        """
+        Registra N solicitações de uma vez, em uma única chamada atômica ao Redis.
+        
+        Args:
+            key: Identificador único (por exemplo, user_id ou IP)
+            limit: Número máximo de solicitações permitidas no período
+            period: Período em segundos (padrão: 60 segundos)
+            category: Categoria da solicitação (ex: "generate", "embed")
+            n: Número de solicitações a registrar
+            
+        Returns:
+            Lista com (is_allowed, rate_limit_info) para cada solicitação, na ordem
+        """
+        if not self.redis:
+            logger.warning("Redis não disponível para verificação de rate limit")
+            reset_at = time.time() + period
+            return [(True, {"remaining": 999, "reset": reset_at}) for _ in range(n)]
+        
+        redis_key = f"rate_limit:{category}:{key}"
+        
+        try:
+            if self._batch_script is None:
+                self._batch_script = self.redis.register_script(RATE_LIMIT_BATCH_SCRIPT)
+            
+            results, reset_at = await self._batch_script(
+                keys=[redis_key],
+                args=[limit, period, time.time(), n]
+            )
+            reset_at = float(reset_at)
+            
+            decisions = [
+                (bool(allowed), {"remaining": int(remaining), "reset": reset_at})
+                for allowed, remaining in results
+            ]
+            
+            blocked = sum(1 for allowed, _ in decisions if not allowed)
+            if blocked:
+                logger.warning(
+                    f"Rate limit atingido para {key} em {category}: "
+                    f"{blocked} de {n} solicitações bloqueadas (limite: {limit})"
+                )
+            
+            return decisions
+            
+        except Exception as e:
+            logger.error(f"Erro ao verificar rate limit em lote: {str(e)}")
+            # Em caso de erro, permitimos as solicitações
+            reset_at = time.time() + period
+            return [(True, {"remaining": 999, "reset": reset_at}) for _ in range(n)]
+    
     async def get_current_usage(self, key: str, category: str = "default") -> Dict[str, Union[int, float]]:
         """
         Obtém informações sobre o uso atual do rate limit.
@@ -4,9 +4,14 @@ from __future__ import annotations
 from typing import Dict, List, Any, Optional, Union
 import logging
 import redis.asyncio as redis
+import asyncio
 import json
-import pickle
-import hashlib
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+import msgpack
+import zstandard
+import xxhash
 
 from typing import TYPE_CHECKING
 
@@ -16,28 +21,219 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Prefixo de versão do formato serializado. Valores sem ele (ex.: blobs antigos
+# em pickle) são tratados como ausentes em vez de desserializados.
+CACHE_FORMAT_VERSION = b"\x01"
+# Mesmo formato, comprimido com zstd
+CACHE_FORMAT_ZSTD = b"\x02"
+
+# Abaixo deste tamanho (em bytes) a compressão não compensa
+COMPRESSION_MIN_SIZE = 256
+
+_ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3)
+_ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor()
+
+# Códigos de ExtType do msgpack para tipos que não têm representação nativa
+_EXT_DATETIME = 1
+_EXT_UUID = 2
+_EXT_DECIMAL = 3
+
+def _msgpack_default(obj: Any) -> msgpack.ExtType:
+    """Converte tipos não nativos do msgpack em ExtType."""
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, UUID):
+        return msgpack.ExtType(_EXT_UUID, obj.bytes)
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode())
+    raise TypeError(f"Tipo não suportado pelo cache: {type(obj).__name__}")
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    """Reconstrói os tipos registrados em _msgpack_default."""
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_UUID:
+        return UUID(bytes=data)
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+def serialize_value(value: Any) -> bytes:
+    """
+    Serializa um valor para armazenamento no cache.
+    
+    Args:
+        value: Valor a ser serializado
+        
+    Returns:
+        Bytes prefixados com a versão do formato (comprimidos com zstd
+        quando o payload é grande o bastante para compensar)
+    """
+    packed = msgpack.packb(value, use_bin_type=True, default=_msgpack_default)
+    if len(packed) >= COMPRESSION_MIN_SIZE:
+        compressed = _ZSTD_COMPRESSOR.compress(packed)
+        if len(compressed) < len(packed):
+            return CACHE_FORMAT_ZSTD + compressed
+    return CACHE_FORMAT_VERSION + packed
+
+def deserialize_value(data: bytes) -> Any:
+    """
+    Desserializa um valor lido do cache.
+    
+    Args:
+        data: Bytes armazenados no cache
+        
+    Returns:
+        Valor original
+        
+    Raises:
+        ValueError: Se os dados não estiverem no formato atual
+    """
+    prefix, payload = data[:1], data[1:]
+    if prefix == CACHE_FORMAT_ZSTD:
+        payload = _ZSTD_DECOMPRESSOR.decompress(payload)
+    elif prefix != CACHE_FORMAT_VERSION:
+        raise ValueError("Formato de cache desconhecido ou legado")
+    return msgpack.unpackb(payload, raw=False, ext_hook=_msgpack_ext_hook)
+
+# Tamanho dos lotes de SCAN/UNLINK usados em flush_tenant
+FLUSH_BATCH_SIZE = 500
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+def hash64(value: str) -> int:
+    """
+    Calcula um hash de 64 bits para roteamento de shards.
+    
+    Args:
+        value: Texto a ser hasheado
+        
+    Returns:
+        Hash como inteiro de 64 bits
+    """
+    # xxh3 é um hash não criptográfico feito para roteamento/tabelas hash,
+    # bem mais barato que blake2b/md5 em chaves curtas
+    return xxhash.xxh3_64_intdigest(value.encode())
+
+def hash_tag(key: str) -> str:
+    """
+    Extrai a hash tag de uma chave, seguindo a regra do Redis Cluster.
+    
+    Se a chave contém '{...}' com conteúdo não vazio, apenas o trecho entre a
+    primeira '{' e a '}' seguinte é usado no roteamento; caso contrário, a
+    chave inteira.
+    
+    Args:
+        key: Chave completa
+        
+    Returns:
+        Trecho da chave usado para escolher o shard
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+def _mix64(x: int) -> int:
+    """Finalizador do splitmix64: espalha os bits de um inteiro de 64 bits."""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+def rendezvous_hash(key_hash: int, node_seeds: List[int]) -> int:
+    """
+    Rendezvous (highest random weight) hashing.
+    
+    Cada nó recebe um peso derivado do hash da chave e da semente do nó; a
+    chave vai para o nó de maior peso. Remover ou adicionar qualquer nó só
+    realoca as chaves daquele nó, independentemente da posição na lista.
+    
+    Args:
+        key_hash: Hash da chave (inteiro de 64 bits)
+        node_seeds: Sementes de 64 bits de cada nó
+        
+    Returns:
+        Índice do nó escolhido
+    """
+    return max(range(len(node_seeds)), key=lambda i: _mix64(key_hash ^ node_seeds[i]))
+
+def jump_hash(key_hash: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach).
+    
+    Mapeia um hash de 64 bits para um bucket em [0, buckets). Ao passar de N
+    para N+1 buckets, apenas ~1/(N+1) das chaves mudam de shard, e sempre para
+    o bucket novo, ao contrário do módulo simples que realoca quase todas.
+    
+    Args:
+        key_hash: Hash da chave (inteiro de 64 bits)
+        buckets: Número de buckets (shards)
+        
+    Returns:
+        Índice do bucket
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key_hash = (key_hash * 2862933555777941757 + 1) & _MASK64
+        j = int((b + 1) * (1 << 31) / ((key_hash >> 33) + 1))
+    return b
+
 class ShardedCache:
     """
     Cache distribuído com suporte a sharding.
     """
     
-    def __init__(self, redis_urls: List[str], sharding_strategy: str = "tenant"):
+    def __init__(self, 
+                redis_urls: List[str], 
+                sharding_strategy: str = "tenant",
+                hash_algorithm: str = "jump"):
         """
         Inicializa o cache shardado.
         
         Args:
             redis_urls: Lista de URLs de conexão Redis
             sharding_strategy: Estratégia de sharding ('tenant' ou 'key')
+            hash_algorithm: Algoritmo de escolha do nó ('jump' ou 'rendezvous').
+                'jump' é O(log n) mas só é estável ao adicionar/remover o último nó;
+                'rendezvous' é O(n) e estável para qualquer nó, pois usa a URL como semente.
         """
+        if hash_algorithm not in ("jump", "rendezvous"):
+            raise ValueError(f"Algoritmo de hash desconhecido: {hash_algorithm}")
+        
         self.nodes = [redis.from_url(url, decode_responses=False) for url in redis_urls]
         self.strategy = sharding_strategy
+        self.hash_algorithm = hash_algorithm
         self.node_count = len(self.nodes)
+        self._node_seeds = [hash64(url) for url in redis_urls]
         
         if self.node_count == 0:
             raise ValueError("Pelo menos um nó Redis é necessário")
         
         logger.info(f"Cache shardado inicializado com {self.node_count} nós")
     
+    def _make_key(self, key: str, tenant_id: Optional[str] = None) -> str:
+        """
+        Monta a chave armazenada no Redis.
+        
+        Chaves de tenant usam o formato 'tenant:{tenant_id}:key'; as chaves
+        literais formam uma hash tag, então todas as chaves de um tenant caem
+        no mesmo shard/slot (inclusive em Redis Cluster), permitindo operações
+        multi-chave e pipelines por tenant.
+        
+        Args:
+            key: Chave lógica
+            tenant_id: ID do tenant (opcional)
+            
+        Returns:
+            Chave completa
+        """
+        if tenant_id:
+            return f"tenant:{{{tenant_id}}}:{key}"
+        return key
+    
     def get_shard(self, key: str, tenant_id: Optional[str] = None) -> redis.Redis:
         """
         Determina qual shard deve ser usado para uma chave.
@@ -51,12 +247,17 @@ class ShardedCache:
         """
         if self.strategy == "tenant" and tenant_id:
             # Shard baseado no tenant_id
-            shard_index = int(hashlib.md5(tenant_id.encode()).hexdigest(), 16) % self.node_count
-        else:
-            # Shard baseado na chave
-            shard_index = int(hashlib.md5(key.encode()).hexdigest(), 16) % self.node_count
+            return self.nodes[self._shard_index(tenant_id)]
         
-        return self.nodes[shard_index]
+        # Shard baseado na chave (ou na sua hash tag, se houver)
+        return self.nodes[self._shard_index(hash_tag(key))]
+    
+    def _shard_index(self, shard_key: str) -> int:
+        """Calcula o índice do shard para uma chave de roteamento."""
+        key_hash = hash64(shard_key)
+        if self.hash_algorithm == "rendezvous":
+            return rendezvous_hash(key_hash, self._node_seeds)
+        return jump_hash(key_hash, self.node_count)
     
     async def get(self, key: str, tenant_id: Optional[str] = None) -> Any:
         """
@@ -69,12 +270,13 @@ class ShardedCache:
         Returns:
             Valor armazenado ou None se não encontrado
         """
-        shard = self.get_shard(key, tenant_id)
+        full_key = self._make_key(key, tenant_id)
+        shard = self.get_shard(full_key, tenant_id)
         
         try:
-            data = await shard.get(key)
+            data = await shard.get(full_key)
             if data:
-                return pickle.loads(data)
+                return deserialize_value(data)
             return None
         except Exception as e:
             logger.error(f"Erro ao obter do cache: {str(e)}")
@@ -97,12 +299,90 @@ class ShardedCache:
         Returns:
             True se bem-sucedido, False caso contrário
         """
-        shard = self.get_shard(key, tenant_id)
+        full_key = self._make_key(key, tenant_id)
+        shard = self.get_shard(full_key, tenant_id)
         
         try:
-            # Serializar o valor usando pickle
-            serialized = pickle.dumps(value)
-            await shard.set(key, serialized, ex=ttl)
+            # Serializar o valor usando msgpack
+            serialized = serialize_value(value)
+            await shard.set(full_key, serialized, ex=ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao definir no cache: {str(e)}")
+            return False
+    
+    def _group_by_shard(self, full_keys: List[str], tenant_id: Optional[str] = None) -> Dict[int, tuple]:
+        """
+        Agrupa as posições das chaves pelo shard de destino.
+        
+        Returns:
+            Dicionário id(shard) -> (shard, posições em full_keys)
+        """
+        groups: Dict[int, tuple] = {}
+        for position, full_key in enumerate(full_keys):
+            shard = self.get_shard(full_key, tenant_id)
+            groups.setdefault(id(shard), (shard, []))[1].append(position)
+        return groups
+    
+    async def mget(self, keys: List[str], tenant_id: Optional[str] = None) -> List[Any]:
+        """
+        Obtém vários valores do cache com um MGET por shard.
+        
+        Args:
+            keys: Chaves do cache
+            tenant_id: ID do tenant (opcional)
+            
+        Returns:
+            Valores na mesma ordem das chaves (None para as não encontradas)
+        """
+        full_keys = [self._make_key(key, tenant_id) for key in keys]
+        results: List[Any] = [None] * len(keys)
+        
+        async def fetch(shard: redis.Redis, positions: List[int]) -> None:
+            try:
+                values = await shard.mget([full_keys[p] for p in positions])
+            except Exception as e:
+                logger.error(f"Erro ao obter do cache: {str(e)}")
+                return
+            
+            for position, data in zip(positions, values):
+                if data:
+                    try:
+                        results[position] = deserialize_value(data)
+                    except Exception as e:
+                        logger.error(f"Erro ao desserializar do cache: {str(e)}")
+        
+        groups = self._group_by_shard(full_keys, tenant_id)
+        await asyncio.gather(*(fetch(shard, positions) for shard, positions in groups.values()))
+        return results
+    
+    async def mset(self,
+                mapping: Dict[str, Any],
+                ttl: int = 3600,
+                tenant_id: Optional[str] = None) -> bool:
+        """
+        Define vários valores no cache com um pipeline por shard.
+        
+        Args:
+            mapping: Dicionário chave -> valor
+            ttl: Tempo de vida em segundos (padrão: 1 hora)
+            tenant_id: ID do tenant (opcional)
+            
+        Returns:
+            True se todos foram gravados, False caso contrário
+        """
+        full_keys = [self._make_key(key, tenant_id) for key in mapping]
+        values = list(mapping.values())
+        
+        async def store(shard: redis.Redis, positions: List[int]) -> None:
+            pipe = shard.pipeline(transaction=False)
+            for position in positions:
+                pipe.set(full_keys[position], serialize_value(values[position]), ex=ttl)
+            await pipe.execute()
+        
+        try:
+            groups = self._group_by_shard(full_keys, tenant_id)
+            await asyncio.gather(*(store(shard, positions) for shard, positions in groups.values()))
             return True
         except Exception as e:
             logger.error(f"Erro ao definir no cache: {str(e)}")
@@ -119,10 +399,11 @@ class ShardedCache:
         Returns:
             True se bem-sucedido, False caso contrário
         """
-        shard = self.get_shard(key, tenant_id)
+        full_key = self._make_key(key, tenant_id)
+        shard = self.get_shard(full_key, tenant_id)
         
         try:
-            await shard.delete(key)
+            await shard.delete(full_key)
             return True
         except Exception as e:
             logger.error(f"Erro ao excluir do cache: {str(e)}")
@@ -139,18 +420,43 @@ class ShardedCache:
         Returns:
             True se bem-sucedido, False caso contrário
         """
-        pattern = f"tenant:{tenant_id}:*"
+        pattern = self._make_key("*", tenant_id)
         
         try:
-            # Como não sabemos em qual shard estão as chaves, verificamos todas
-            for shard in self.nodes:
-                keys = await shard.keys(pattern)
-                if keys:
-                    await shard.delete(*keys)
+            # As chaves novas do tenant ficam num único shard, mas chaves gravadas antes
+            # de uma mudança de topologia podem estar em outro; limpamos todos em paralelo
+            await asyncio.gather(*(self._flush_node(shard, pattern) for shard in self.nodes))
             return True
         except Exception as e:
             logger.error(f"Erro ao limpar tenant do cache: {str(e)}")
             return False
+    
+    async def _flush_node(self, node: redis.Redis, pattern: str) -> None:
+        """
+        Remove as chaves que casam com o padrão em um único nó.
+        
+        SCAN percorre o keyspace em lotes sem bloquear o Redis (KEYS é O(N)
+        bloqueante); cada lote de UNLINKs vai num pipeline executado ao fim
+        do lote, para não acumular todas as chaves do tenant em memória, e a
+        liberação de memória fica fora da thread principal.
+        
+        Args:
+            node: Nó Redis
+            pattern: Padrão de chaves a remover
+        """
+        pipe = node.pipeline(transaction=False)
+        batch = []
+        
+        async for key in node.scan_iter(match=pattern, count=FLUSH_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= FLUSH_BATCH_SIZE:
+                pipe.unlink(*batch)
+                await pipe.execute()
+                batch = []
+        
+        if batch:
+            pipe.unlink(*batch)
+            await pipe.execute()
 
 # Atualizar a função get_cache para suportar sharding
 def get_cache(sharded: bool = False) -> Union[ShardedCache, 'Cache']:
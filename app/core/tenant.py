@@ -1,10 +1,15 @@
 # app/core/tenant.py
+from contextvars import ContextVar
+from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi import Request
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tenant da requisição atual, definido pelo TenantMiddleware
+current_tenant_id: ContextVar[Optional[str]] = ContextVar("current_tenant_id", default=None)
+
 def tenant_filter(query, model, request=None, tenant_id=None):
     """
     Aplica filtro de tenant a uma query SQLAlchemy.
@@ -13,20 +18,21 @@ def tenant_filter(query, model, request=None, tenant_id=None):
         query: SQLAlchemy query
         model: Modelo SQLAlchemy
         request: FastAPI Request (opcional)
-        tenant_id: ID do tenant específico (opcional)
+        tenant_id: ID do tenant específico (opcional; senão usa o tenant
+            da requisição atual e, por fim, request.state)
         
     Returns:
         Query filtrada por tenant
     """
     # Determinar o tenant_id (prioridade para o parâmetro explícito)
-    effective_tenant_id = tenant_id
+    effective_tenant_id = tenant_id or current_tenant_id.get()
     
     if not effective_tenant_id and request and hasattr(request.state, "tenant_id"):
         effective_tenant_id = request.state.tenant_id
     
     # Se temos um tenant_id e o modelo tem o campo organization_id, aplicar filtro
     if effective_tenant_id and hasattr(model, "organization_id"):
-        logger.debug(f"Aplicando filtro de tenant {effective_tenant_id} para modelo {model.__name__}")
+        logger.debug("Aplicando filtro de tenant %s para modelo %s", effective_tenant_id, model.__name__)
         return query.filter(model.organization_id == effective_tenant_id)
     
     return query
\ No newline at end of file
@@ -1,9 +1,14 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional, Union, AsyncGenerator  # Adicione AsyncGenerator aqui
 import logging
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# Limites (em palavras) das faixas usadas por generate_batch para agrupar prompts
+GENERATE_BATCH_BIN_EDGES = (16, 64, 256)
+
 class LLMBase(ABC):
     """
     Classe base abstrata para implementações de modelos de linguagem.
@@ -19,7 +24,29 @@ class LLMBase(ABC):
         """
         self.model_config = model_config
         self.model_name = model_config.get('model_name', 'default')
+        self._client: Optional[httpx.AsyncClient] = None
         self.initialize()
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Cliente HTTP compartilhado pelas chamadas do modelo.
+        
+        Criado na primeira requisição e reutilizado depois, mantendo as
+        conexões vivas (keep-alive) em vez de refazer o handshake TCP/TLS
+        a cada generate/embed.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=32)
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        """Fecha o cliente HTTP compartilhado, se houver."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         
     @abstractmethod
     def initialize(self) -> None:
@@ -64,6 +91,59 @@ class LLMBase(ABC):
         """
         pass
     
+    async def generate_batch(self,
+                  prompts: List[str],
+                  max_tokens: Optional[int] = None,
+                  temperature: Optional[float] = None,
+                  **kwargs) -> List[str]:
+        """
+        Gera textos para vários prompts, agrupados por faixa de comprimento.
+        
+        Prompts de tamanho parecido formam uma faixa, enviada a
+        _generate_bin; todas as faixas rodam em paralelo, então a latência
+        total é a da chamada mais lenta. Implementações com suporte nativo a
+        lotes sobrescrevem _generate_bin, e cada lote nativo contém só
+        prompts de comprimento parecido.
+        
+        Args:
+            prompts: Lista de prompts
+            max_tokens: Número máximo de tokens a serem gerados
+            temperature: Parâmetro de temperatura para controlar aleatoriedade
+            **kwargs: Parâmetros adicionais específicos do modelo
+            
+        Returns:
+            Lista de textos gerados, na mesma ordem dos prompts
+        """
+        bins: Dict[int, List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            length = len(prompt.split())
+            bin_id = sum(length > edge for edge in GENERATE_BATCH_BIN_EDGES)
+            bins.setdefault(bin_id, []).append(index)
+        
+        groups = [bins[bin_id] for bin_id in sorted(bins)]
+        outputs = await asyncio.gather(*(
+            self._generate_bin([prompts[i] for i in indexes], max_tokens=max_tokens, temperature=temperature, **kwargs)
+            for indexes in groups
+        ))
+        
+        results: List[Optional[str]] = [None] * len(prompts)
+        for indexes, bin_outputs in zip(groups, outputs):
+            for i, output in zip(indexes, bin_outputs):
+                results[i] = output
+        
+        return results
+    
+    async def _generate_bin(self,
+                  prompts: List[str],
+                  max_tokens: Optional[int] = None,
+                  temperature: Optional[float] = None,
+                  **kwargs) -> List[str]:
+        """Gera uma faixa de prompts; sem lote nativo, uma chamada concorrente por prompt."""
+        return list(await asyncio.gather(*(
+            self.generate(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+            for prompt in prompts
+        )))
+    
     def get_model_info(self) -> Dict[str, Any]:
         """
         Retorna informações sobre o modelo.
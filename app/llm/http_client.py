@@ -1,5 +1,4 @@
 # app/llm/http_client.py
-import httpx
 from typing import Dict, List, Any, Optional, Union, AsyncGenerator
 import logging
 import json
@@ -50,52 +49,54 @@ class HttpLLM(LLMBase):
         if stream:
             return self._generate_stream(request_data)
         else:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                try:
-                    response = await client.post(
-                        f"{self.server_url}/generate",
-                        json=request_data
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Erro no servidor LLM: {response.status_code} - {response.text}")
-                        raise Exception(f"Erro no servidor: {response.status_code} - {response.text}")
-                    
-                    result = response.json()
-                    return result["text"]
+            client = self.http_client
+            try:
+                response = await client.post(
+                    f"{self.server_url}/generate",
+                    json=request_data,
+                    timeout=self.timeout
+                )
+                
+                if response.status_code != 200:
+                    logger.error(f"Erro no servidor LLM: {response.status_code} - {response.text}")
+                    raise Exception(f"Erro no servidor: {response.status_code} - {response.text}")
                 
-                except Exception as e:
-                    logger.error(f"Erro ao chamar servidor LLM: {str(e)}")
-                    raise
+                result = response.json()
+                return result["text"]
+            
+            except Exception as e:
+                logger.error(f"Erro ao chamar servidor LLM: {str(e)}")
+                raise
     
     async def _generate_stream(self, request_data: Dict[str, Any]) -> AsyncGenerator[str, None]:
         """
         Gera texto em formato de stream a partir do servidor LLM.
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                async with client.stream(
-                    "POST",
-                    f"{self.server_url}/generate",
-                    json=request_data
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.text()
-                        logger.error(f"Erro no servidor LLM: {response.status_code} - {error_text}")
-                        raise Exception(f"Erro no servidor: {response.status_code} - {error_text}")
-                    
-                    async for chunk in response.aiter_lines():
-                        if chunk:
-                            try:
-                                data = json.loads(chunk)
-                                if "text" in data:
-                                    yield data["text"]
-                            except json.JSONDecodeError:
-                                logger.warning(f"Erro ao decodificar chunk JSON: {chunk}")
-            
-            except Exception as e:
-                logger.error(f"Erro durante streaming do servidor LLM: {str(e)}")
-                raise
+        client = self.http_client
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.server_url}/generate",
+                json=request_data,
+                timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    error_text = await response.text()
+                    logger.error(f"Erro no servidor LLM: {response.status_code} - {error_text}")
+                    raise Exception(f"Erro no servidor: {response.status_code} - {error_text}")
+                
+                async for chunk in response.aiter_lines():
+                    if chunk:
+                        try:
+                            data = json.loads(chunk)
+                            if "text" in data:
+                                yield data["text"]
+                        except json.JSONDecodeError:
+                            logger.warning(f"Erro ao decodificar chunk JSON: {chunk}")
+        
+        except Exception as e:
+            logger.error(f"Erro durante streaming do servidor LLM: {str(e)}")
+            raise
     
     async def embed(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         """
@@ -107,20 +108,21 @@ class HttpLLM(LLMBase):
             "model_id": self.model_config.get("target_model", "llama")
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.server_url}/embed",
-                    json=request_data
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Erro no servidor LLM: {response.status_code} - {response.text}")
-                    raise Exception(f"Erro no servidor: {response.status_code} - {response.text}")
-                
-                result = response.json()
-                return result["embedding"]
+        client = self.http_client
+        try:
+            response = await client.post(
+                f"{self.server_url}/embed",
+                json=request_data,
+                timeout=self.timeout
+            )
             
-            except Exception as e:
-                logger.error(f"Erro ao obter embeddings do servidor LLM: {str(e)}")
-                raise
\ No newline at end of file
+            if response.status_code != 200:
+                logger.error(f"Erro no servidor LLM: {response.status_code} - {response.text}")
+                raise Exception(f"Erro no servidor: {response.status_code} - {response.text}")
+            
+            result = response.json()
+            return result["embedding"]
+        
+        except Exception as e:
+            logger.error(f"Erro ao obter embeddings do servidor LLM: {str(e)}")
+            raise
\ No newline at end of file
@@ -30,12 +30,15 @@ class LlamaLLM(LLMBase):
         # Configurações padrão com fallback para configurações customizadas
         n_ctx = self.model_config.get("n_ctx", 4096)
         n_gpu_layers = self.model_config.get("n_gpu_layers", -1)  # -1 para usar todas
+        # Tokens do prompt processados por passo (prefill em blocos)
+        n_batch = self.model_config.get("n_batch", 512)
         
         try:
             self.model = Llama(
                 model_path=model_path,
                 n_ctx=n_ctx,
                 n_gpu_layers=n_gpu_layers,
+                n_batch=n_batch,
                 verbose=self.model_config.get("verbose", False)
             )
             self.tokenizer = LlamaTokenizer(self.model)
@@ -167,15 +170,14 @@ class LlamaLLM(LLMBase):
         else:
             texts = text
         
-        embeddings = []
-        for single_text in texts:
-            # Executar em um thread separado para não bloquear
-            loop = asyncio.get_event_loop()
-            embedding = await loop.run_in_executor(
-                None,
-                lambda: self.model.embed(single_text)
-            )
-            embeddings.append(embedding.tolist())  # Converter numpy array para lista
+        # Uma única chamada em lote, em um thread separado para não bloquear
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: self.model.embed(texts)
+        )
+        # Converter numpy arrays para lista, se for o caso
+        embeddings = [e.tolist() if hasattr(e, "tolist") else e for e in result]
         
         # Retornar um único embedding ou lista dependendo da entrada
         return embeddings[0] if isinstance(text, str) else embeddings
\ No newline at end of file
@@ -1,7 +1,6 @@
 # app/llm/mistral.py
 import os
 import json
-import httpx
 from typing import Dict, List, Any, Optional, Union, AsyncGenerator
 import logging
 import asyncio
@@ -72,25 +71,25 @@ class MistralLLM(LLMBase):
             return self._generate_stream(request_data, headers)
         else:
             # Chamada síncrona
-            async with httpx.AsyncClient() as client:
-                try:
-                    response = await client.post(
-                        f"{self.api_url}/completions",
-                        headers=headers,
-                        json=request_data,
-                        timeout=60.0
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Erro na API Mistral: {response.status_code} - {response.text}")
-                        raise Exception(f"Erro na API: {response.status_code} - {response.text}")
-                    
-                    result = response.json()
-                    return result["choices"][0]["text"]
+            client = self.http_client
+            try:
+                response = await client.post(
+                    f"{self.api_url}/completions",
+                    headers=headers,
+                    json=request_data,
+                    timeout=60.0
+                )
                 
-                except Exception as e:
-                    logger.error(f"Erro ao chamar API Mistral: {str(e)}")
-                    raise
+                if response.status_code != 200:
+                    logger.error(f"Erro na API Mistral: {response.status_code} - {response.text}")
+                    raise Exception(f"Erro na API: {response.status_code} - {response.text}")
+                
+                result = response.json()
+                return result["choices"][0]["text"]
+            
+            except Exception as e:
+                logger.error(f"Erro ao chamar API Mistral: {str(e)}")
+                raise
     
     async def _generate_stream(self, 
                           request_data: Dict[str, Any],
@@ -105,44 +104,44 @@ class MistralLLM(LLMBase):
         Yields:
             Pedaços de texto gerados
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                async with client.stream(
-                    "POST",
-                    f"{self.api_url}/completions",
-                    headers=headers,
-                    json=request_data,
-                    timeout=120.0
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.text()
-                        logger.error(f"Erro na API Mistral: {response.status_code} - {error_text}")
-                        raise Exception(f"Erro na API: {response.status_code} - {error_text}")
+        client = self.http_client
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.api_url}/completions",
+                headers=headers,
+                json=request_data,
+                timeout=120.0
+            ) as response:
+                if response.status_code != 200:
+                    error_text = await response.text()
+                    logger.error(f"Erro na API Mistral: {response.status_code} - {error_text}")
+                    raise Exception(f"Erro na API: {response.status_code} - {error_text}")
+                
+                # Processar a resposta de streaming
+                async for chunk in response.aiter_lines():
+                    if not chunk.strip():
+                        continue
                     
-                    # Processar a resposta de streaming
-                    async for chunk in response.aiter_lines():
-                        if not chunk.strip():
-                            continue
-                        
-                        if chunk.startswith("data: "):
-                            chunk = chunk[6:]  # Remove o prefixo "data: "
-                        
-                        # Pula a mensagem "[DONE]"
-                        if chunk == "[DONE]":
-                            break
-                        
-                        try:
-                            data = json.loads(chunk)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                token = data["choices"][0].get("text", "")
-                                if token:
-                                    yield token
-                        except json.JSONDecodeError:
-                            logger.warning(f"Erro ao decodificar chunk JSON: {chunk}")
-            
-            except Exception as e:
-                logger.error(f"Erro durante streaming da API Mistral: {str(e)}")
-                raise
+                    if chunk.startswith("data: "):
+                        chunk = chunk[6:]  # Remove o prefixo "data: "
+                    
+                    # Pula a mensagem "[DONE]"
+                    if chunk == "[DONE]":
+                        break
+                    
+                    try:
+                        data = json.loads(chunk)
+                        if "choices" in data and len(data["choices"]) > 0:
+                            token = data["choices"][0].get("text", "")
+                            if token:
+                                yield token
+                    except json.JSONDecodeError:
+                        logger.warning(f"Erro ao decodificar chunk JSON: {chunk}")
+        
+        except Exception as e:
+            logger.error(f"Erro durante streaming da API Mistral: {str(e)}")
+            raise
     
     async def embed(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         """
@@ -172,25 +171,25 @@ class MistralLLM(LLMBase):
         }
         
         # Faz a chamada para a API
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.api_url}/embeddings",
-                    headers=headers,
-                    json=request_data,
-                    timeout=60.0
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Erro na API Mistral: {response.status_code} - {response.text}")
-                    raise Exception(f"Erro na API: {response.status_code} - {response.text}")
-                
-                result = response.json()
-                embeddings = [item["embedding"] for item in result["data"]]
-                
-                # Retorna um único embedding ou uma lista dependendo da entrada
-                return embeddings[0] if isinstance(text, str) else embeddings
+        client = self.http_client
+        try:
+            response = await client.post(
+                f"{self.api_url}/embeddings",
+                headers=headers,
+                json=request_data,
+                timeout=60.0
+            )
             
-            except Exception as e:
-                logger.error(f"Erro ao obter embeddings da API Mistral: {str(e)}")
-                raise
\ No newline at end of file
+            if response.status_code != 200:
+                logger.error(f"Erro na API Mistral: {response.status_code} - {response.text}")
+                raise Exception(f"Erro na API: {response.status_code} - {response.text}")
+            
+            result = response.json()
+            embeddings = [item["embedding"] for item in result["data"]]
+            
+            # Retorna um único embedding ou uma lista dependendo da entrada
+            return embeddings[0] if isinstance(text, str) else embeddings
+        
+        except Exception as e:
+            logger.error(f"Erro ao obter embeddings da API Mistral: {str(e)}")
+            raise
\ No newline at end of file
@@ -1,8 +1,11 @@
 # app/llm/router.py
 import asyncio
+import hashlib
+import math
 import time
 import random
-from typing import Dict, Any, List, Optional, Union, Type, AsyncGenerator
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Union, Type, AsyncGenerator, Callable, Tuple
 import logging
 
 from app.llm.base import LLMBase
@@ -22,6 +25,13 @@ class LLMRouter:
     def __init__(self):
         self.models: Dict[str, LLMBase] = {}
         self.default_model: Optional[str] = None
+        # Espera pelo modelo principal antes de disparar a requisição de hedge
+        # para o próximo modelo (None desativa o hedge)
+        self.hedge_delay: Optional[float] = settings.LLM_HEDGE_DELAY
+        # Cache semântico opcional consultado por route_generate (sem streaming)
+        self.semantic_cache: Optional["SemanticCache"] = (
+            SemanticCache(self) if settings.LLM_SEMANTIC_CACHE else None
+        )
         self.model_registry: Dict[str, Type[LLMBase]] = {
             "llama": LlamaLLM,
             "mistral": MistralLLM,
@@ -35,11 +45,29 @@ class LLMRouter:
         
         Args:
             model_id: Identificador único para o modelo
-            model_config: Configuração do modelo
+            model_config: Configuração do modelo (a chave "instance" permite
+                registrar um LLMBase já construído)
             default: Se True, define este modelo como o padrão
         """
         model_type = model_config.get("type", "").lower()
         
+        # Reaproveita a instância já registrada com a mesma configuração
+        # (evita recarregar pesos / recriar conexões do modelo)
+        existing = self.models.get(model_id)
+        if existing is not None and existing.model_config == model_config:
+            if default or self.default_model is None:
+                self.default_model = model_id
+            return
+        
+        # Instância pré-construída: registra diretamente, sem passar pela fábrica
+        instance = model_config.get("instance")
+        if instance is not None:
+            self.models[model_id] = instance
+            logger.info(f"Modelo {model_id} registrado a partir de instância existente")
+            if default or self.default_model is None:
+                self.default_model = model_id
+            return
+        
         if model_type not in self.model_registry:
             raise ValueError(f"Tipo de modelo não suportado: {model_type}")
         
@@ -96,6 +124,18 @@ class LLMRouter:
         Returns:
             Texto gerado ou gerador de streaming
         """
+        if self.semantic_cache is not None:
+            return await self.semantic_cache.generate(
+                prompt, model_id=model_id, fallback=fallback, **kwargs
+            )
+        return await self._route_generate(prompt, model_id=model_id, fallback=fallback, **kwargs)
+    
+    async def _route_generate(self,
+                              prompt: str,
+                              model_id: Optional[str] = None,
+                              fallback: bool = True,
+                              **kwargs) -> Union[str, AsyncGenerator[str, None]]:
+        """Roteamento efetivo de route_generate, sem passar pelo cache semântico."""
         # Se nenhum modelo for especificado, use o padrão
         target_id = model_id or self.default_model
         
@@ -112,43 +152,84 @@ class LLMRouter:
             random.shuffle(remaining_models)
             models_to_try.extend(remaining_models)
         
-        # Tenta cada modelo na lista
+        # Sem streaming, se o modelo atual demorar mais que hedge_delay,
+        # dispara o próximo em paralelo e fica com a primeira resposta.
+        # Um model_id explícito nunca é contornado pelo hedge.
+        hedge = (
+            self.hedge_delay is not None
+            and model_id is None
+            and not kwargs.get("stream", False)
+        )
+        hedged = False
+        remaining = iter(models_to_try)
+        pending: Dict[asyncio.Task, str] = {}
+        
+        def launch_next() -> bool:
+            current_id = next(remaining, None)
+            if current_id is None:
+                return False
+            task = asyncio.create_task(self._timed_generate(current_id, prompt, **kwargs))
+            pending[task] = current_id
+            return True
+        
+        launch_next()
         last_error = None
-        for current_id in models_to_try:
-            try:
-                model = self.get_model(current_id)
-                start_time = time.time()
-                
-                # Tenta gerar texto com o modelo atual
-                result = await model.generate(prompt, **kwargs)
-                
-                # Se não for o modelo original solicitado, registra que usou fallback
-                if current_id != target_id:
-                    logger.info(f"Fallback para modelo {current_id} bem-sucedido")
-                
-                # Registra métricas de tempo
-                generation_time = time.time() - start_time
-                logger.debug(f"Modelo {current_id} gerou resposta em {generation_time:.2f}s")
-                
-                return result
+        try:
+            while pending:
+                timeout = self.hedge_delay if hedge and not hedged else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
                 
-            except Exception as e:
-                last_error = e
-                logger.warning(f"Erro com modelo {current_id}: {str(e)}")
+                if not done:
+                    # Modelo lento: uma única requisição de hedge
+                    hedged = True
+                    if launch_next():
+                        logger.debug(f"Hedge disparado após {self.hedge_delay}s")
+                    continue
                 
-                # Se for streaming, não podemos prosseguir para outros modelos
-                if kwargs.get("stream", False):
-                    logger.error("Não é possível fazer fallback para streaming")
-                    raise e
+                for task in done:
+                    current_id = pending.pop(task)
+                    error = task.exception()
+                    
+                    if error is None:
+                        # Se não for o modelo original solicitado, registra que usou fallback
+                        if current_id != target_id:
+                            logger.info(f"Fallback para modelo {current_id} bem-sucedido")
+                        return task.result()
+                    
+                    last_error = error
+                    logger.warning(f"Erro com modelo {current_id}: {str(error)}")
+                    
+                    # Se for streaming, não podemos prosseguir para outros modelos
+                    if kwargs.get("stream", False):
+                        logger.error("Não é possível fazer fallback para streaming")
+                        raise error
                 
-                # Continua para o próximo modelo se houver fallback
-                continue
+                # Continua para o próximo modelo se nenhum estiver em andamento
+                if not pending:
+                    launch_next()
+        finally:
+            # Cancela a requisição perdedora (ou todas, se formos cancelados)
+            for task in pending:
+                task.cancel()
         
         # Se chegou aqui, todos os modelos falharam
         error_msg = f"Todos os modelos falharam. Último erro: {str(last_error)}"
         logger.error(error_msg)
         raise Exception(error_msg)
     
+    async def _timed_generate(self, model_id: str, prompt: str, **kwargs) -> Union[str, AsyncGenerator[str, None]]:
+        """Gera texto com um modelo específico registrando o tempo gasto."""
+        model = self.get_model(model_id)
+        start_time = time.time()
+        
+        result = await model.generate(prompt, **kwargs)
+        
+        # Registra métricas de tempo
+        generation_time = time.time() - start_time
+        logger.debug(f"Modelo {model_id} gerou resposta em {generation_time:.2f}s")
+        
+        return result
+    
     async def route_embed(self, 
                     text: Union[str, List[str]],
                     model_id: Optional[str] = None,
@@ -212,6 +293,30 @@ class LLMRouter:
         logger.error(error_msg)
         raise Exception(error_msg)
     
+    async def embed_batch(self,
+                    texts: List[str],
+                    model_id: Optional[str] = None,
+                    batch_size: int = 32,
+                    fallback: bool = True) -> List[List[float]]:
+        """
+        Cria embeddings para muitos textos em lotes concorrentes.
+        
+        Args:
+            texts: Lista de textos
+            model_id: ID do modelo a ser usado (opcional)
+            batch_size: Quantidade de textos por chamada ao modelo
+            fallback: Se True, tenta outros modelos em caso de falha
+            
+        Returns:
+            Lista de vetores, na mesma ordem dos textos
+        """
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results = await asyncio.gather(*(
+            self.route_embed(batch, model_id=model_id, fallback=fallback)
+            for batch in batches
+        ))
+        return [embedding for batch in results for embedding in batch]
+    
     def list_models(self) -> List[Dict[str, Any]]:
         """
         Lista todos os modelos registrados e suas informações.
@@ -227,6 +332,172 @@ class LLMRouter:
             models_info.append(info)
         
         return models_info
+    
+    async def close(self) -> None:
+        """Fecha os clientes HTTP compartilhados de todos os modelos."""
+        for model in self.models.values():
+            await model.close()
+
+class EmbedBatcher:
+    """
+    Micro-batching de embeddings.
+    
+    Junta os textos pedidos individualmente durante uma janela curta
+    (max_wait) e os envia ao modelo numa única chamada em lote, devolvendo
+    a cada chamador o seu vetor.
+    """
+    
+    def __init__(self,
+                 router: LLMRouter,
+                 model_id: Optional[str] = None,
+                 max_wait: float = 0.005,
+                 max_batch_size: int = 32):
+        self.router = router
+        self.model_id = model_id
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._texts: List[str] = []
+        self._futures: List[asyncio.Future] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._dispatches: set = set()
+    
+    async def embed(self, text: str) -> List[float]:
+        """
+        Cria o embedding de um texto, agrupado com os demais pedidos da janela.
+        
+        Args:
+            text: Texto único
+            
+        Returns:
+            Vetor de embedding
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._texts.append(text)
+        self._futures.append(future)
+        
+        if len(self._texts) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        texts, futures = self._texts, self._futures
+        self._texts, self._futures = [], []
+        
+        if texts:
+            task = asyncio.create_task(self._dispatch(texts, futures))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+    
+    async def _dispatch(self, texts: List[str], futures: List[asyncio.Future]) -> None:
+        try:
+            embeddings = await self.router.route_embed(texts, model_id=self.model_id)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for future, embedding in zip(futures, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+def _md5_key(prompt: str) -> str:
+    """Gerador padrão de chave exata para o SemanticCache."""
+    return hashlib.md5(prompt.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+class SemanticCache:
+    """
+    Cache semântico em memória na frente de route_generate.
+    
+    As entradas são separadas pelos parâmetros de geração (model_id,
+    temperature, max_tokens...): só se reaproveita a resposta gerada com os
+    mesmos parâmetros. Dentro desse grupo, procura primeiro pela chave exata
+    do prompt (key_generator); sem acerto, cria o embedding do prompt e
+    devolve a resposta do prompt armazenado mais parecido, se a similaridade
+    de cosseno atingir o limiar. Pedidos com streaming não passam pelo
+    cache. As entradas seguem política LRU com no máximo max_entries itens.
+    """
+    
+    def __init__(self,
+                 router: LLMRouter,
+                 threshold: float = 0.92,
+                 max_entries: int = 256,
+                 key_generator: Callable[[str], str] = _md5_key,
+                 embed_model_id: Optional[str] = None):
+        self.router = router
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.key_generator = key_generator
+        self.embed_model_id = embed_model_id
+        # (parâmetros, chave exata) -> (embedding do prompt, resposta)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[float], str]]" = OrderedDict()
+    
+    @staticmethod
+    def _params_key(kwargs: Dict[str, Any]) -> str:
+        # fallback só muda a política de tentativa, não o texto gerado
+        params = {k: v for k, v in kwargs.items() if k != "fallback"}
+        return repr(sorted(params.items()))
+    
+    async def generate(self, prompt: str, **kwargs) -> Union[str, AsyncGenerator[str, None]]:
+        """
+        Gera texto via router, reutilizando respostas de prompts equivalentes.
+        
+        Args:
+            prompt: Texto de entrada
+            **kwargs: Parâmetros repassados a route_generate (model_id,
+                temperature, max_tokens...)
+            
+        Returns:
+            Texto gerado ou recuperado do cache (ou gerador, com streaming)
+        """
+        if kwargs.get("stream", False):
+            return await self.router._route_generate(prompt, **kwargs)
+        
+        params_key = self._params_key(kwargs)
+        key = (params_key, self.key_generator(prompt))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[1]
+        
+        try:
+            embedding = await self.router.route_embed(prompt, model_id=self.embed_model_id)
+        except Exception as e:
+            # Sem embedding não há como comparar nem armazenar; gera sem o cache
+            logger.warning(f"Cache semântico indisponível, embedding falhou: {str(e)}")
+            return await self.router._route_generate(prompt, **kwargs)
+        
+        best_key, best_score = None, self.threshold
+        for cached_key, (cached_embedding, _) in self._entries.items():
+            if cached_key[0] != params_key:
+                continue
+            score = _cosine_similarity(embedding, cached_embedding)
+            if score >= best_score:
+                best_key, best_score = cached_key, score
+        
+        if best_key is not None:
+            self._entries.move_to_end(best_key)
+            logger.debug(f"Acerto semântico no cache (similaridade {best_score:.3f})")
+            return self._entries[best_key][1]
+        
+        result = await self.router._route_generate(prompt, **kwargs)
+        self._entries[key] = (embedding, result)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
 
 # Cria uma instância global do router
 llm_router = LLMRouter()
@@ -245,6 +516,7 @@ def initialize_models_from_config():
                     "model_path": settings.LLAMA_MODEL_PATH,
                     "n_ctx": getattr(settings, "LLAMA_N_CTX", 4096),
                     "n_gpu_layers": getattr(settings, "LLAMA_N_GPU_LAYERS", -1),
+                    "n_batch": getattr(settings, "LLAMA_N_BATCH", 512),
                     "verbose": getattr(settings, "LLAMA_VERBOSE", False)
                 },
                 default=True
@@ -1,6 +1,7 @@
 # app/llm/smart_router.py - Versão corrigida com integração do Queue Manager
 
 import time
+import hashlib
 import logging
 import random
 import re
@@ -18,6 +19,17 @@ from app.core.cache import get_cache
 
 logger = logging.getLogger(__name__)
 
+def _stable_digest(text: str) -> str:
+    """Hash estável entre processos (ao contrário de hash()), usado nas chaves de cache."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+# Padrões para tipos de consulta, compilados uma única vez
+_CODE_QUERY_RE = re.compile(r"(código|code|programa|function|def\s+|class\s+|```|import\s+)", re.IGNORECASE)
+_CREATIVE_QUERY_RE = re.compile(r"(crie|imagine|invente|write\s+a|story|fiction|creative|poema|poem|história)", re.IGNORECASE)
+_FACTUAL_QUERY_RE = re.compile(r"(explique|defina|o que é|what is|define|explain|quando|where|who|history|como|how to)", re.IGNORECASE)
+_REASONING_QUERY_RE = re.compile(r"(por que|why|reason|explain|solve|resolver|provar|prove|logic|lógica|análise|analyze)", re.IGNORECASE)
+_COMPUTATION_QUERY_RE = re.compile(r"(calcule|compute|calculate|solve|math|equation|formula|número|número|estatística|statistics)", re.IGNORECASE)
+
 class ModelSelector:
     """
     Seletor inteligente de modelos LLM com base em características da consulta.
@@ -64,6 +76,12 @@ class ModelSelector:
             ]
         }
         
+        # Versões compiladas dos padrões, reutilizadas em todas as análises
+        self._complexity_regexes = {
+            complexity: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for complexity, patterns in self.complexity_patterns.items()
+        }
+        
         # Características dos modelos para seleção inteligente
         self.model_characteristics = {
             "default": {
@@ -183,14 +201,26 @@ class ModelSelector:
             return "low"
         
         # Verificar padrões em ordem decrescente de complexidade
-        for complexity, patterns in self.complexity_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, query, re.IGNORECASE):
+        for complexity, regexes in self._complexity_regexes.items():
+            for regex in regexes:
+                if regex.search(query):
                     return complexity
         
         # Se nenhum padrão corresponder, default para medium
         return "medium"
     
+    def analyze_query_complexity_batch(self, queries: List[str]) -> List[str]:
+        """
+        Analisa a complexidade de várias consultas de uma vez.
+        
+        Args:
+            queries: Lista de consultas
+            
+        Returns:
+            Lista de níveis de complexidade, na mesma ordem das consultas
+        """
+        return [self.analyze_query_complexity(query) for query in queries]
+    
     def determine_query_type(self, query: str) -> Dict[str, float]:
         """
         Determina o tipo de consulta e os pesos de importância para diferentes características.
@@ -202,11 +232,11 @@ class ModelSelector:
             Dicionário com pesos para diferentes características
         """
         # Padrões para tipos de consulta
-        is_code_query = bool(re.search(r"(código|code|programa|function|def\s+|class\s+|```|import\s+)", query, re.IGNORECASE))
-        is_creative_query = bool(re.search(r"(crie|imagine|invente|write\s+a|story|fiction|creative|poema|poem|história)", query, re.IGNORECASE))
-        is_factual_query = bool(re.search(r"(explique|defina|o que é|what is|define|explain|quando|where|who|history|como|how to)", query, re.IGNORECASE))
-        is_reasoning_query = bool(re.search(r"(por que|why|reason|explain|solve|resolver|provar|prove|logic|lógica|análise|analyze)", query, re.IGNORECASE))
-        is_computation_query = bool(re.search(r"(calcule|compute|calculate|solve|math|equation|formula|número|número|estatística|statistics)", query, re.IGNORECASE))
+        is_code_query = bool(_CODE_QUERY_RE.search(query))
+        is_creative_query = bool(_CREATIVE_QUERY_RE.search(query))
+        is_factual_query = bool(_FACTUAL_QUERY_RE.search(query))
+        is_reasoning_query = bool(_REASONING_QUERY_RE.search(query))
+        is_computation_query = bool(_COMPUTATION_QUERY_RE.search(query))
         
         # Pesos padrão
         weights = {
@@ -260,6 +290,18 @@ class ModelSelector:
         
         return weights
     
+    def determine_query_type_batch(self, queries: List[str]) -> List[Dict[str, float]]:
+        """
+        Determina os pesos de características para várias consultas de uma vez.
+        
+        Args:
+            queries: Lista de consultas
+            
+        Returns:
+            Lista de dicionários de pesos, na mesma ordem das consultas
+        """
+        return [self.determine_query_type(query) for query in queries]
+    
     async def get_operational_metrics(self) -> Dict[str, Dict[str, Any]]:
         """
         Obtém métricas operacionais atuais para os modelos.
@@ -465,6 +507,36 @@ class SmartLLMRouter:
             self._queue_started = True
             logger.info("Queue manager iniciado pelo SmartLLMRouter")
 
+    def precompute_cache_key(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """
+        Calcula a chave de cache de uma geração.
+        
+        Chamadores que repetem a mesma consulta podem calculá-la uma vez e
+        passá-la como _cache_key para smart_generate.
+        
+        Args:
+            prompt: Texto de entrada
+            max_tokens: Número máximo de tokens
+            temperature: Controle de aleatoriedade
+            **kwargs: Parâmetros adicionais (api_key é ignorado)
+            
+        Returns:
+            Chave de cache estável entre processos
+        """
+        params = {
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            **{k: v for k, v in kwargs.items() if k not in ["api_key"]}
+        }
+        return f"llm:generate:{_stable_digest(repr(sorted(params.items())))}"
+    
     async def smart_generate(
         self, 
         prompt: str,
@@ -491,11 +563,15 @@ class SmartLLMRouter:
             user_id: ID do usuário (para limitação de taxa)
             priority: Prioridade da solicitação (1-10, menor = maior prioridade)
             timeout: Timeout em segundos
-            **kwargs: Parâmetros adicionais
+            **kwargs: Parâmetros adicionais (_cache_key reutiliza uma chave
+                obtida de precompute_cache_key)
             
         Returns:
             Texto gerado ou gerador de streaming
         """
+        # Chave pré-calculada pelo chamador (ver precompute_cache_key)
+        cache_key = kwargs.pop("_cache_key", None)
+        
         # Se estiver em modo de streaming, não usar cache e não usar fila
         if stream:
             use_cache = False
@@ -505,16 +581,11 @@ class SmartLLMRouter:
             )
         
         # Verificar cache se estiver ativado
-        cache_key = None
-        if use_cache:
-            # Criar chave de cache que inclui todos os parâmetros relevantes
-            params = {
-                "prompt": prompt,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                **{k: v for k, v in kwargs.items() if k not in ["api_key"]}
-            }
-            cache_key = f"llm:generate:{hash(str(params))}"
+        if not use_cache:
+            cache_key = None
+        else:
+            if cache_key is None:
+                cache_key = self.precompute_cache_key(prompt, max_tokens, temperature, **kwargs)
             
             try:
                 cached_result = await self.cache.get(cache_key)
@@ -741,7 +812,7 @@ class SmartLLMRouter:
         if use_cache:
             # Criar chave de cache
             text_for_hash = text if isinstance(text, str) else str(text)
-            cache_key = f"llm:embed:{hash(text_for_hash)}"
+            cache_key = f"llm:embed:{_stable_digest(text_for_hash)}"
             
             try:
                 cached_result = await self.cache.get(cache_key)
@@ -355,6 +355,13 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"❌ Erro ao encerrar Smart Router: {str(e)}")
     
+    try:
+        from app.llm.router import llm_router
+        await llm_router.close()
+        logger.info("✅ Clientes HTTP dos modelos LLM encerrados")
+    except Exception as e:
+        logger.error(f"❌ Erro ao encerrar clientes LLM: {str(e)}")
+    
     logger.info("=== ✅ SISTEMA ENCERRADO ===")
 
 # =============================================================================
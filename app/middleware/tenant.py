@@ -4,29 +4,42 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from app.db.database import get_db
 from app.models.organization import Organization
 from app.core.security import get_current_user
+from app.core.tenant import current_tenant_id
 
 class TenantMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        # Extrair tenant do header ou do usuário autenticado
-        tenant_header = request.headers.get("X-Tenant-ID")
+        # Extrair tenant do header ou do usuário autenticado, lendo os
+        # headers crus do escopo ASGI (evita montar o objeto Headers)
+        tenant_id = None
+        auth_header = None
+        for name, value in request.scope["headers"]:
+            if name == b"x-tenant-id":
+                tenant_id = value.decode("latin-1")
+                break
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
         
-        if tenant_header:
-            request.state.tenant_id = tenant_header
-        else:
+        if not tenant_id:
             # Tentar obter do usuário autenticado (se for o caso)
             try:
-                auth_header = request.headers.get("Authorization")
                 if auth_header and auth_header.startswith("Bearer "):
                     db = next(get_db())
                     user = await get_current_user(auth_header.replace("Bearer ", ""), db)
                     if user and user.organization_id:
-                        request.state.tenant_id = user.organization_id
+                        tenant_id = user.organization_id
             except:
                 # Se falhar, não define tenant_id
                 pass
         
-        # Continuar com o request
-        response = await call_next(request)
+        if tenant_id:
+            request.state.tenant_id = tenant_id
+        
+        # Continuar com o request, com o tenant visível via contextvar
+        token = current_tenant_id.set(tenant_id)
+        try:
+            response = await call_next(request)
+        finally:
+            current_tenant_id.reset(token)
         return response
 
 # app/main.py - Adicionar o middleware
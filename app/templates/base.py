@@ -5,11 +5,33 @@ import json
 import re
 import asyncio
 from datetime import datetime
+from functools import lru_cache
 
 from app.models.template import Template, TemplateDepartment
 
 logger = logging.getLogger(__name__)
 
+# Padrão para encontrar variáveis: {{nome_variavel}}
+# E variáveis com tipo: {{nome_variavel:tipo}}
+# E variáveis com tipo e padrão: {{nome_variavel:tipo=padrão}}
+_VARIABLE_PATTERN = re.compile(r'\{\{([a-zA-Z_][a-zA-Z0-9_]*)(?::([a-zA-Z_]+)(?:=([^}]+))?)?\}\}')
+
+@lru_cache(maxsize=256)
+def _scan_variables(prompt_template: str) -> tuple:
+    """
+    Varre o texto do template uma única vez por conteúdo distinto.
+    
+    Args:
+        prompt_template: Texto do template
+        
+    Returns:
+        Tupla imutável de (nome, tipo, padrão) para cada variável encontrada
+    """
+    return tuple(
+        (match.group(1), match.group(2) or "string", match.group(3) or "")
+        for match in _VARIABLE_PATTERN.finditer(prompt_template)
+    )
+
 class TemplateManager:
     """
     Gerenciador de templates para agentes.
@@ -213,16 +235,8 @@ class TemplateManager:
         """
         variables = {}
         
-        # Padrão para encontrar variáveis: {{nome_variavel}}
-        # E variáveis com tipo: {{nome_variavel:tipo}}
-        # E variáveis com tipo e padrão: {{nome_variavel:tipo=padrão}}
-        pattern = r'\{\{([a-zA-Z_][a-zA-Z0-9_]*)(?::([a-zA-Z_]+)(?:=([^}]+))?)?\}\}'
-        
-        for match in re.finditer(pattern, prompt_template):
-            var_name = match.group(1)
-            var_type = match.group(2) or "string"
-            var_default = match.group(3) or ""
-            
+        # A varredura é memorizada por conteúdo; o dicionário é novo a cada chamada
+        for var_name, var_type, var_default in _scan_variables(prompt_template):
             variables[var_name] = {
                 "type": var_type,
                 "default": var_default,
@@ -1,15 +1,26 @@
 # app/tests/conftest.py - Versão melhorada com melhor isolamento
 import pytest
+import pytest_asyncio
 import asyncio
 from unittest.mock import MagicMock, patch
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
+import httpx
+from httpx import ASGITransport
+from types import SimpleNamespace
+from pathlib import Path
 import os
+import sys
+
+# Raiz do projeto no path, para que os módulos de teste importem "app.*" sem preâmbulo
+ROOT_DIR = str(Path(__file__).resolve().parents[2])
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
 
 from app.main import app
-from app.models.user import User
-from app.models.agent import Agent
-from app.models.conversation import Conversation
+from app.api.batch_api import router as batch_router
+from app.api.agents_api import router as agents_router
+from app.api.test_api import router as test_router
 from app.models.message import Message
 from app.core.security import get_current_active_user
 from app.db.database import get_db
@@ -21,6 +32,31 @@ os.environ["DB_NAME"] = "test_onsmart"
 # Configuração pytest-asyncio
 pytest_plugins = ['pytest_asyncio']
 
+def _route_signatures(routes):
+    return {
+        (route.path, frozenset(getattr(route, "methods", None) or ()))
+        for route in routes if hasattr(route, "path")
+    }
+
+def include_router_once(router):
+    """
+    Inclui o router no app apenas se ele ainda não estiver registrado.
+    
+    A tabela de rotas do app é varrida linearmente a cada requisição, então
+    reincluir o mesmo router (ex.: módulo de teste importado de novo) só
+    duplica entradas e deixa todo o roteamento mais lento.
+    """
+    routes = app.router.routes
+    if any(getattr(route, "original_router", None) is router for route in routes):
+        return
+    if _route_signatures(router.routes) <= _route_signatures(routes):
+        return
+    app.include_router(router)
+
+# Registrar os routers usados pelos testes uma única vez por sessão
+for _router in (batch_router, agents_router, test_router):
+    include_router_once(_router)
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Cria um event loop para toda a sessão de testes."""
@@ -31,7 +67,7 @@ def event_loop():
 # Mocks globais para dependências
 def create_mock_user():
     """Cria um mock de usuário consistente."""
-    user = MagicMock(spec=User)
+    user = MagicMock()
     user.id = "test-user-123"
     user.email = "test@example.com"
     user.name = "Test User"
@@ -57,22 +93,22 @@ def mock_user():
 @pytest.fixture
 def mock_agent():
     """Mock para agente."""
-    agent = MagicMock(spec=Agent)
-    agent.id = "test-agent-123"
-    agent.name = "Test Agent"
-    agent.user_id = "test-user-123"
-    agent.is_active = True
-    return agent
+    return SimpleNamespace(
+        id="test-agent-123",
+        name="Test Agent",
+        user_id="test-user-123",
+        is_active=True
+    )
 
 @pytest.fixture
 def mock_conversation():
     """Mock para conversa."""
-    conversation = MagicMock(spec=Conversation)
-    conversation.id = "test-conv-123"
-    conversation.title = "Test Conversation"
-    conversation.user_id = "test-user-123"
-    conversation.agent_id = "test-agent-123"
-    return conversation
+    return SimpleNamespace(
+        id="test-conv-123",
+        title="Test Conversation",
+        user_id="test-user-123",
+        agent_id="test-agent-123"
+    )
 
 @pytest.fixture
 def authenticated_client():
@@ -93,6 +129,17 @@ def test_client():
     """Cliente de teste FastAPI básico."""
     return TestClient(app)
 
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_client():
+    """
+    Cliente HTTP assíncrono compartilhado por toda a sessão.
+    
+    Fala direto com o app via ASGITransport, sem a ponte sync→async do
+    TestClient, e reaproveita o mesmo pool entre os testes.
+    """
+    async with httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
 @pytest.fixture
 def cache():
     """Mock para cache."""
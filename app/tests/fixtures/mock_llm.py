@@ -0,0 +1,98 @@
+"""
+Implementação simulada de LLM compartilhada pelos testes e scripts de teste.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from typing import List, Dict, Optional, Union, AsyncGenerator
+
+from app.llm.base import LLMBase
+
+logger = logging.getLogger(__name__)
+
+# Latência simulada por chamada (segundos); zero por padrão para não travar os testes
+MOCK_LLM_LATENCY = float(os.environ.get("MOCK_LLM_LATENCY", "0"))
+
+class MockLLM(LLMBase):
+    """Implementação simulada para testes."""
+    
+    def initialize(self) -> None:
+        """Inicializa o modelo."""
+        self.initialized = True
+        self.embed_dim = self.model_config.get("embed_dim", 10)
+        self.latency = self.model_config.get("latency", MOCK_LLM_LATENCY)
+        # Cache de respostas por hash do prompt, com um lock por prompt para que
+        # pedidos concorrentes iguais esperem a primeira geração (single-flight)
+        self._cache: Dict[bytes, str] = {}
+        self._locks: Dict[bytes, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._cache_hits = 0
+        self._cache_misses = 0
+        logger.info(f"Mock LLM inicializado: {self.model_name}")
+    
+    async def generate(self, 
+                  prompt: str, 
+                  max_tokens: Optional[int] = None,
+                  temperature: Optional[float] = None,
+                  stream: bool = False,
+                  **kwargs) -> Union[str, AsyncGenerator[str, None]]:
+        """Gera texto simulado."""
+        if not stream:
+            key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+            async with self._locks[key]:
+                if key in self._cache:
+                    self._cache_hits += 1
+                    return self._cache[key]
+                
+                self._cache_misses += 1
+                result = await self._generate(prompt)
+                self._cache[key] = result
+                return result
+        
+        return await self._generate(prompt, stream=True)
+    
+    async def _generate(self, prompt: str, stream: bool = False) -> Union[str, AsyncGenerator[str, None]]:
+        logger.info(f"Gerando texto com modelo {self.model_name} para prompt: {prompt[:30]}...")
+        await self._simulate_latency()  # Simula processamento
+        
+        if stream:
+            async def fake_stream():
+                tokens = ["Este", "é", "um", "texto", "simulado", "do", "modelo", self.model_name]
+                for token in tokens:
+                    await self._simulate_latency(0.2)
+                    yield token
+            return fake_stream()
+        else:
+            return f"Este é um texto simulado do modelo {self.model_name} para: {prompt[:20]}..."
+    
+    async def _simulate_latency(self, factor: float = 1.0) -> None:
+        """Aguarda a latência configurada, se houver."""
+        if self.latency:
+            await asyncio.sleep(self.latency * factor)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Retorna os acertos e erros do cache de respostas."""
+        return {"hits": self._cache_hits, "misses": self._cache_misses, "size": len(self._cache)}
+    
+    async def generate_batch(self,
+                  prompts: List[str],
+                  max_tokens: Optional[int] = None,
+                  temperature: Optional[float] = None,
+                  **kwargs) -> List[str]:
+        """Gera textos simulados para vários prompts numa única chamada."""
+        logger.info(f"Gerando {len(prompts)} textos em lote com modelo {self.model_name}")
+        await self._simulate_latency()  # Simula processamento (uma vez para o lote todo)
+        
+        return [f"Este é um texto simulado do modelo {self.model_name} para: {p[:20]}..." for p in prompts]
+    
+    async def embed(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        """Cria embedding simulado."""
+        logger.info(f"Criando embedding com modelo {self.model_name}")
+        await self._simulate_latency()  # Simula processamento
+        
+        # Cria vetores simulados de embed_dim dimensões
+        if isinstance(text, str):
+            return [0.1] * self.embed_dim
+        else:
+            return [[0.1] * self.embed_dim for _ in text]
@@ -0,0 +1,26 @@
+"""
+Execução dos scripts de teste assíncronos.
+"""
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Executa uma corrotina até o fim num event loop novo.
+
+    Usa uvloop (instalado com uvicorn[standard]) quando disponível; ele não
+    existe no Windows, onde cai para o loop padrão do asyncio.
+
+    Args:
+        coro: Corrotina a executar
+
+    Returns:
+        Resultado da corrotina
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    return uvloop.run(coro)
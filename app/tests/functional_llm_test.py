@@ -1,5 +1,7 @@
 """
 Teste funcional para a infraestrutura de LLM
+
+Executar a partir da raiz do projeto: python -m app.tests.functional_llm_test
 """
 import os
 import sys
@@ -7,17 +9,8 @@ import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-# Adicionar diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-root_dir = os.path.dirname(parent_dir)
-if root_dir not in sys.path:
-    sys.path.append(root_dir)
-
 # Configurar variável de ambiente para SECRET_KEY
 os.environ["SECRET_KEY"] = "test_secret_key"
 
@@ -308,6 +301,9 @@ class FunctionalTest:
         return total_passed == len(tests)
 
 if __name__ == "__main__":
+    # Configuração de logging
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    
     try:
         # Usar o novo padrão recomendado para asyncio
         async def main():
@@ -2,14 +2,12 @@
 import pytest
 from fastapi.testclient import TestClient
 from fastapi import Depends, Body
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from app.core.security import get_current_active_user
 from app.db.database import get_db
 import json
 
 from app.main import app
-from app.api.batch_api import router as batch_router
-from app.api.agents_api import router as agents_router  # CORREÇÃO: Importar router de agentes
 from app.models.agent import AgentType
 
 # Configurar mocks globais
@@ -33,15 +31,86 @@ def mock_get_db():
 app.dependency_overrides[get_current_active_user] = mock_get_current_user
 app.dependency_overrides[get_db] = mock_get_db
 
-# CORREÇÃO: Garantir que ambos os routers estão incluídos
-if batch_router not in [route.app for route in app.routes if hasattr(route, 'app')]:
-    app.include_router(batch_router)
-    
-if agents_router not in [route.app for route in app.routes if hasattr(route, 'app')]:
-    app.include_router(agents_router)
+# Os routers de batch e agentes são registrados uma única vez no conftest
 
 client = TestClient(app)
 
+# Dados para atualização em lote - usando formato correto do schema
+_BATCH_UPDATE_DATA = [
+    {
+        "agent_id": "agent-1",
+        "name": "Updated Agent 1",
+        "description": "New description 1",
+        "is_active": True,
+        "configuration": {
+            "company_name": "TechCorp",
+            "updated": True
+        }
+    },
+    {
+        "agent_id": "agent-2", 
+        "name": "Updated Agent 2",
+        "description": "New description 2",
+        "is_active": False,
+        "configuration": {
+            "company_name": "AnotherCorp",
+            "updated": True
+        }
+    }
+]
+
+# Dados para criação em lote - usando valores corretos do enum
+_BATCH_CREATE_DATA = [
+    {
+        "name": "New Marketing Agent",
+        "description": "Agente especializado em marketing digital",
+        "agent_type": "marketing",  # Valor correto do enum
+        "template_id": "template-marketing-123",
+        "configuration": {
+            "company_name": "TechCorp",
+            "primary_platform": "LinkedIn",
+            "brand_tone": "profissional",
+            "target_audience": "Empresas B2B"
+        }
+    },
+    {
+        "name": "New Sales Agent",
+        "description": "Agente especializado em vendas B2B",
+        "agent_type": "sales",  # Valor correto do enum
+        "template_id": "template-sales-456",
+        "configuration": {
+            "company_name": "TechCorp",
+            "product_category": "Software empresarial",
+            "sales_style": "consultivo",
+            "sales_priority": "construir relacionamentos"
+        }
+    }
+]
+
+# Dados inválidos para testar validação
+_BATCH_INVALID_CREATE_DATA = [
+    {
+        "name": "",  # Nome vazio deve falhar
+        "description": "Description",
+        "agent_type": "marketing",
+        "template_id": "template-1",
+        "configuration": {}
+    },
+    {
+        "name": "Valid Agent",
+        "description": "Description",
+        "agent_type": "invalid_type",  # Tipo inválido deve falhar
+        "template_id": "template-2",
+        "configuration": {}
+    }
+]
+
+# Corpos serializados uma única vez por módulo, em vez de a cada requisição
+_JSON_HEADERS = {"content-type": "application/json"}
+_BATCH_UPDATE_BODY = json.dumps(_BATCH_UPDATE_DATA)
+_BATCH_CREATE_BODY = json.dumps(_BATCH_CREATE_DATA)
+_BATCH_INVALID_CREATE_BODY = json.dumps(_BATCH_INVALID_CREATE_DATA)
+
 class TestBatchOperations:
     @pytest.fixture(autouse=True)
     def setup_method(self):
@@ -52,20 +121,18 @@ class TestBatchOperations:
         app.dependency_overrides[get_db] = mock_get_db
     
     @pytest.fixture
-    def agent_service_mock(self):
+    def agent_service_mock(self, monkeypatch):
         """Fixture para mock do serviço de agentes."""
-        with patch('app.api.batch_api.get_agent_service') as mock:
-            agent_service = MagicMock()
-            mock.return_value = agent_service
-            yield agent_service
+        agent_service = MagicMock()
+        monkeypatch.setattr('app.api.batch_api.get_agent_service', lambda db: agent_service)
+        return agent_service
     
     @pytest.fixture
-    def template_service_mock(self):
+    def template_service_mock(self, monkeypatch):
         """Fixture para mock do serviço de templates."""
-        with patch('app.api.batch_api.get_template_service') as mock:
-            template_service = MagicMock()
-            mock.return_value = template_service
-            yield template_service
+        template_service = MagicMock()
+        monkeypatch.setattr('app.api.batch_api.get_template_service', lambda db: template_service)
+        return template_service
     
     def test_batch_update_agents(self, agent_service_mock):
         """Testa atualização em lote de agentes."""
@@ -78,16 +145,9 @@ class TestBatchOperations:
         agent2.id = "agent-2"  
         agent2.user_id = "user-123"
         
-        # Configurar get_agent para retornar os agentes mockados
-        def mock_get_agent(agent_id):
-            if agent_id == "agent-1":
-                return agent1
-            elif agent_id == "agent-2":
-                return agent2
-            else:
-                return None
-        
-        agent_service_mock.get_agent.side_effect = mock_get_agent
+        # Configurar get_agent para retornar os agentes mockados (None se não existir)
+        agents = {"agent-1": agent1, "agent-2": agent2}
+        agent_service_mock.get_agent.side_effect = agents.get
         
         # Configurar update_agent para retornar agente atualizado
         def mock_update_agent(agent_id, **kwargs):
@@ -100,32 +160,11 @@ class TestBatchOperations:
         
         agent_service_mock.update_agent.side_effect = mock_update_agent
         
-        # Dados para o teste - usando formato correto do schema
-        data = [
-            {
-                "agent_id": "agent-1",
-                "name": "Updated Agent 1",
-                "description": "New description 1",
-                "is_active": True,
-                "configuration": {
-                    "company_name": "TechCorp",
-                    "updated": True
-                }
-            },
-            {
-                "agent_id": "agent-2", 
-                "name": "Updated Agent 2",
-                "description": "New description 2",
-                "is_active": False,
-                "configuration": {
-                    "company_name": "AnotherCorp",
-                    "updated": True
-                }
-            }
-        ]
         
         # Fazer a requisição
-        response = client.post("/api/batch/agents/update", json=data)
+        response = client.post(
+            "/api/batch/agents/update", content=_BATCH_UPDATE_BODY, headers=_JSON_HEADERS
+        )
         
         # Debug em caso de falha
         if response.status_code != 200:
@@ -161,42 +200,17 @@ class TestBatchOperations:
         
         agent_service_mock.create_agent.side_effect = mock_create_agent
         
-        # Dados para o teste - usando valores corretos do enum
-        data = [
-            {
-                "name": "New Marketing Agent",
-                "description": "Agente especializado em marketing digital",
-                "agent_type": "marketing",  # Valor correto do enum
-                "template_id": "template-marketing-123",
-                "configuration": {
-                    "company_name": "TechCorp",
-                    "primary_platform": "LinkedIn",
-                    "brand_tone": "profissional",
-                    "target_audience": "Empresas B2B"
-                }
-            },
-            {
-                "name": "New Sales Agent",
-                "description": "Agente especializado em vendas B2B",
-                "agent_type": "sales",  # Valor correto do enum
-                "template_id": "template-sales-456",
-                "configuration": {
-                    "company_name": "TechCorp",
-                    "product_category": "Software empresarial",
-                    "sales_style": "consultivo",
-                    "sales_priority": "construir relacionamentos"
-                }
-            }
-        ]
         
         # Fazer a requisição
-        response = client.post("/api/batch/agents/create", json=data)
+        response = client.post(
+            "/api/batch/agents/create", content=_BATCH_CREATE_BODY, headers=_JSON_HEADERS
+        )
         
         # Debug em caso de falha
         if response.status_code != 200:
             print(f"Response status: {response.status_code}")
             print(f"Response content: {response.text}")
-            print(f"Request data: {json.dumps(data, indent=2)}")
+            print(f"Request data: {json.dumps(_BATCH_CREATE_DATA, indent=2)}")
         
         # Verificar resposta
         assert response.status_code == 200
@@ -217,26 +231,11 @@ class TestBatchOperations:
     
     def test_batch_create_agents_validation_error(self, agent_service_mock):
         """Testa validação de dados inválidos na criação em lote."""
-        # Dados inválidos para testar validação
-        data = [
-            {
-                "name": "",  # Nome vazio deve falhar
-                "description": "Description",
-                "agent_type": "marketing",
-                "template_id": "template-1",
-                "configuration": {}
-            },
-            {
-                "name": "Valid Agent",
-                "description": "Description",
-                "agent_type": "invalid_type",  # Tipo inválido deve falhar
-                "template_id": "template-2",
-                "configuration": {}
-            }
-        ]
         
         # Fazer a requisição
-        response = client.post("/api/batch/agents/create", json=data)
+        response = client.post(
+            "/api/batch/agents/create", content=_BATCH_INVALID_CREATE_BODY, headers=_JSON_HEADERS
+        )
         
         # Deve retornar erro de validação (422 ou 400)
         assert response.status_code in [400, 422]
@@ -251,14 +250,14 @@ class TestPatchOperations:
         app.dependency_overrides[get_db] = mock_get_db
     
     @pytest.fixture
-    def agent_service_mock(self):
+    def agent_service_mock(self, monkeypatch):
         """Fixture para mock do serviço de agentes."""
-        with patch('app.api.agents_api.get_agent_service') as mock:
-            service = MagicMock()
-            mock.return_value = service
-            yield service
+        service = MagicMock()
+        monkeypatch.setattr('app.api.agents_api.get_agent_service', lambda db: service)
+        return service
     
-    def test_patch_agent(self, agent_service_mock):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_patch_agent(self, agent_service_mock, async_client, monkeypatch):
         """Testa atualização parcial de agente."""
         # Mock para o agente no banco
         agent = MagicMock()
@@ -284,52 +283,51 @@ class TestPatchOperations:
         agent_service_mock.update_agent.return_value = updated_agent
         
         # CORREÇÃO: Patch direto do get_db no módulo de agents_api
-        with patch('app.api.agents_api.get_db') as mock_get_db_func:
-            mock_db = MagicMock()
-            mock_db.query.return_value.filter.return_value.first.return_value = agent
-            mock_get_db_func.return_value = mock_db
-            
-            # Dados para o patch
-            data = {
-                "name": "Updated Name",
-                "description": "Updated description",
-                "is_active": True,
-                "configuration": {
-                    "company_name": "UpdatedCorp",
-                    "new_setting": "new_value"
-                }
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = agent
+        monkeypatch.setattr('app.api.agents_api.get_db', lambda: mock_db)
+        
+        # Dados para o patch
+        data = {
+            "name": "Updated Name",
+            "description": "Updated description",
+            "is_active": True,
+            "configuration": {
+                "company_name": "UpdatedCorp",
+                "new_setting": "new_value"
             }
+        }
+        
+        # Fazer a requisição PATCH
+        response = await async_client.patch("/api/agents/agent-123", json=data)
+        
+        # Debug em caso de falha
+        if response.status_code != 200:
+            print(f"Response status: {response.status_code}")
+            print(f"Response content: {response.text}")
             
-            # Fazer a requisição PATCH
-            response = client.patch("/api/agents/agent-123", json=data)
-            
-            # Debug em caso de falha
-            if response.status_code != 200:
-                print(f"Response status: {response.status_code}")
-                print(f"Response content: {response.text}")
+            # CORREÇÃO: Se o endpoint não existir, reportar o problema
+            if response.status_code == 404:
+                # Verificar se o endpoint existe
+                test_response = await async_client.get("/api/debug/endpoints")
+                if test_response.status_code == 200:
+                    endpoints = test_response.json()
+                    patch_endpoints = [r for r in endpoints.get("routes", []) if "PATCH" in str(r.get("methods", []))]
+                    print(f"PATCH endpoints disponíveis: {patch_endpoints}")
                 
-                # CORREÇÃO: Se o endpoint não existir, reportar o problema
-                if response.status_code == 404:
-                    # Verificar se o endpoint existe
-                    test_response = client.get("/api/debug/endpoints")
-                    if test_response.status_code == 200:
-                        endpoints = test_response.json()
-                        patch_endpoints = [r for r in endpoints.get("routes", []) if "PATCH" in str(r.get("methods", []))]
-                        print(f"PATCH endpoints disponíveis: {patch_endpoints}")
-                    
-                    # Se realmente não existir, pular o teste
-                    pytest.skip("Endpoint PATCH /api/agents/{agent_id} não está implementado")
-            
-            # Verificar resposta
-            assert response.status_code == 200
-            
-            # Verificar se update_agent foi chamado
-            agent_service_mock.update_agent.assert_called_once()
-            
-            # Verificar argumentos passados para update_agent
-            call_args = agent_service_mock.update_agent.call_args
-            assert call_args[1]["name"] == "Updated Name"
-            assert call_args[1]["is_active"] == True
+                # Se realmente não existir, pular o teste
+                pytest.skip("Endpoint PATCH /api/agents/{agent_id} não está implementado")
+        
+        # Verificar resposta
+        assert response.status_code == 200
+        
+        # Verificar se update_agent foi chamado
+        agent_service_mock.update_agent.assert_called_once()
+        
+        # Verificar argumentos passados para update_agent
+        call_args = agent_service_mock.update_agent.call_args
+        assert call_args[1]["name"] == "Updated Name"
+        assert call_args[1]["is_active"] == True
 
 class TestValidationHelpers:
     """Testa funcionalidades de validação específicas."""
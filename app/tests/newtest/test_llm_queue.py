@@ -1,20 +1,28 @@
 # tests/test_llm_queue.py
 import pytest
+import pytest_asyncio
 import asyncio
 from unittest.mock import MagicMock, patch
 import time
 
 from app.llm.queue_manager import LLMQueueManager, PriorityTask
 
+async def _wait_until_drained(manager: LLMQueueManager):
+    """Aguarda até não haver tarefas na fila nem em execução."""
+    while manager.tasks or manager.active_tasks:
+        await asyncio.sleep(0.01)
+
 class TestLLMQueueManager:
-    @pytest.fixture
-    def queue_manager(self):
-        """Fixture para o gerenciador de fila."""
+    @pytest_asyncio.fixture(scope="function")
+    async def queue_manager(self):
+        """Fixture para o gerenciador de fila (parado no teardown para não vazar workers)."""
         manager = LLMQueueManager(max_concurrent=3)
-        return manager
+        yield manager
+        if manager.running:
+            await manager.stop()
     
     @pytest.mark.asyncio
-    async def test_priority_ordering(self, queue_manager):
+    async def test_priority_ordering(self):
         """Testa se as tarefas são ordenadas corretamente por prioridade."""
         # Criar tarefas com diferentes prioridades
         task1 = PriorityTask(priority=5, task_id="task1", coro=MagicMock())
@@ -63,13 +71,15 @@ class TestLLMQueueManager:
         # Configurar para iniciar e parar após um tempo
         queue_manager.running = True
         
-        # Adicionar tarefas
-        await queue_manager.enqueue(success_coro(), priority=1)
-        await queue_manager.enqueue(error_coro(), priority=2)
+        # Adicionar tarefas concorrentemente
+        await asyncio.gather(
+            queue_manager.enqueue(success_coro(), priority=1),
+            queue_manager.enqueue(error_coro(), priority=2)
+        )
         
-        # Iniciar worker por um curto período
+        # Iniciar worker e aguardar a fila esvaziar (em vez de um sleep fixo)
         worker_task = asyncio.create_task(queue_manager._worker_loop())
-        await asyncio.sleep(0.5)  # Dar tempo para processar
+        await asyncio.wait_for(_wait_until_drained(queue_manager), timeout=1.0)
         
         # Parar o worker
         queue_manager.running = False
@@ -0,0 +1,201 @@
+# tests/test_llm_router.py
+import pytest
+import asyncio
+import time
+from typing import List, Optional, Union, AsyncGenerator
+
+from app.llm.base import LLMBase
+from app.llm.router import LLMRouter, EmbedBatcher, SemanticCache
+from app.llm.smart_router import SmartLLMRouter
+from app.tests.fixtures import mock_llm
+
+class MockLLM(LLMBase):
+    """Implementação simulada que registra as chamadas recebidas."""
+    
+    def initialize(self) -> None:
+        self.delay = self.model_config.get("delay", 0)
+        self.embed_calls: List[List[str]] = []
+    
+    async def generate(self,
+                  prompt: str,
+                  max_tokens: Optional[int] = None,
+                  temperature: Optional[float] = None,
+                  stream: bool = False,
+                  **kwargs) -> Union[str, AsyncGenerator[str, None]]:
+        await asyncio.sleep(self.delay)
+        return self.model_name
+    
+    async def embed(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        texts = [text] if isinstance(text, str) else list(text)
+        self.embed_calls.append(texts)
+        embeddings = [[float(len(t))] for t in texts]
+        return embeddings[0] if isinstance(text, str) else embeddings
+
+class EchoLLM(MockLLM):
+    """Modelo simulado que devolve o próprio prompt e registra a ordem das chamadas."""
+    
+    def initialize(self) -> None:
+        super().initialize()
+        self.calls: List[str] = []
+    
+    async def generate(self, prompt: str, **kwargs) -> str:
+        self.calls.append(prompt)
+        return prompt
+
+class BinnedLLM(EchoLLM):
+    """Modelo simulado com lote nativo lento que registra as faixas recebidas."""
+    
+    def initialize(self) -> None:
+        super().initialize()
+        self.bins: List[List[str]] = []
+    
+    async def _generate_bin(self, prompts: List[str], **kwargs) -> List[str]:
+        self.bins.append(prompts)
+        await asyncio.sleep(0.1)
+        return list(prompts)
+
+class VectorLLM(EchoLLM):
+    """Modelo simulado cujos embeddings só distinguem o primeiro termo do texto."""
+    
+    async def embed(self, text):
+        return [1.0, 0.0] if text.startswith("gato") else [0.0, 1.0]
+
+@pytest.fixture
+def router():
+    """Fixture para um router com o modelo simulado registrado."""
+    router = LLMRouter()
+    router.model_registry["mock"] = MockLLM
+    router.register_model("mock", {"type": "mock", "model_name": "mock"}, default=True)
+    return router
+
+class TestLLMRouter:
+    @pytest.mark.asyncio
+    async def test_embed_batch_chunks_and_keeps_order(self, router):
+        """Testa se embed_batch divide em lotes e preserva a ordem dos textos."""
+        texts = ["a" * i for i in range(1, 6)]
+        
+        result = await router.embed_batch(texts, batch_size=2)
+        
+        assert result == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert [len(call) for call in router.get_model("mock").embed_calls] == [2, 2, 1]
+    
+    @pytest.mark.asyncio
+    async def test_embed_batcher_coalesces_requests(self, router):
+        """Testa se o EmbedBatcher agrupa pedidos concorrentes numa única chamada."""
+        batcher = EmbedBatcher(router, max_wait=0.01)
+        
+        result = await asyncio.gather(*(batcher.embed("x" * i) for i in range(1, 4)))
+        
+        assert result == [[1.0], [2.0], [3.0]]
+        assert router.get_model("mock").embed_calls == [["x", "xx", "xxx"]]
+    
+    @pytest.mark.asyncio
+    async def test_route_generate_hedges_slow_model(self, router):
+        """Testa se um modelo lento é contornado por uma requisição de hedge."""
+        router.register_model("slow", {"type": "mock", "model_name": "slow", "delay": 5}, default=True)
+        router.hedge_delay = 0.01
+        
+        result = await asyncio.wait_for(router.route_generate("prompt"), timeout=1.0)
+        
+        assert result == "mock"
+    
+    @pytest.mark.asyncio
+    async def test_route_generate_does_not_hedge_explicit_model(self, router):
+        """Testa se um model_id explícito não é contornado pelo hedge."""
+        router.register_model("slow", {"type": "mock", "model_name": "slow", "delay": 5}, default=True)
+        router.hedge_delay = 0.01
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(router.route_generate("prompt", model_id="slow"), timeout=0.1)
+    
+    @pytest.mark.asyncio
+    async def test_mock_latency_overlaps_under_gather(self, monkeypatch):
+        """Testa se chamadas concorrentes ao mock sobrepõem a latência simulada."""
+        latency = 0.2
+        monkeypatch.setattr(mock_llm, "MOCK_LLM_LATENCY", latency)
+        model = mock_llm.MockLLM({"model_name": "lento"})
+        prompts = [f"prompt {i}" for i in range(20)]
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(model.generate(p) for p in prompts))
+        elapsed = time.perf_counter() - start
+        
+        assert len(results) == len(prompts)
+        assert elapsed < 1.5 * latency
+    
+    def test_smart_cache_key_is_deterministic(self, router):
+        """Testa se a chave de cache do smart router depende só dos parâmetros relevantes."""
+        smart_router = SmartLLMRouter(router)
+        key = smart_router.precompute_cache_key("prompt", max_tokens=50, temperature=0.7)
+        
+        assert key == smart_router.precompute_cache_key("prompt", max_tokens=50, temperature=0.7, api_key="segredo")
+        assert key != smart_router.precompute_cache_key("prompt", max_tokens=60, temperature=0.7)
+    
+    @pytest.mark.asyncio
+    async def test_generate_batch_groups_by_length_and_keeps_order(self):
+        """Testa se generate_batch agrupa por comprimento, roda as faixas em paralelo e mantém a ordem."""
+        model = BinnedLLM({"model_name": "binned"})
+        prompts = ["palavra " * 100, "curto", "palavra " * 30, "outro curto"]
+        
+        start = time.perf_counter()
+        results = await model.generate_batch(prompts, max_tokens=10, temperature=0.5)
+        elapsed = time.perf_counter() - start
+        
+        assert results == prompts
+        assert model.bins == [[prompts[1], prompts[3]], [prompts[2]], [prompts[0]]]
+        assert elapsed < 0.25
+    
+    @pytest.mark.asyncio
+    async def test_generate_batch_default_calls_generate_per_prompt(self):
+        """Testa se, sem lote nativo, cada prompt vira uma chamada a generate."""
+        model = EchoLLM({"model_name": "echo"})
+        prompts = ["palavra " * 100, "curto"]
+        
+        assert await model.generate_batch(prompts) == prompts
+        assert sorted(model.calls) == sorted(prompts)
+    
+    @pytest.mark.asyncio
+    async def test_semantic_cache_reuses_similar_prompts(self):
+        """Testa se o cache semântico reaproveita prompts parecidos e gera os distintos."""
+        router = LLMRouter()
+        model = VectorLLM({"model_name": "vector"})
+        router.register_model("vector", {"instance": model}, default=True)
+        cache = SemanticCache(router, threshold=0.9)
+        
+        first = await cache.generate("gato preto")
+        exact = await cache.generate("gato preto")
+        similar = await cache.generate("gato pardo")
+        different = await cache.generate("carro azul")
+        
+        assert first == exact == similar == "gato preto"
+        assert different == "carro azul"
+        assert model.calls == ["gato preto", "carro azul"]
+    
+    @pytest.mark.asyncio
+    async def test_semantic_cache_separates_generation_params(self):
+        """Testa se o cache semântico não mistura respostas de parâmetros diferentes nem streaming."""
+        router = LLMRouter()
+        model = VectorLLM({"model_name": "vector"})
+        router.register_model("vector", {"instance": model}, default=True)
+        router.semantic_cache = SemanticCache(router, threshold=0.9)
+        
+        await router.route_generate("gato preto", temperature=0.1)
+        await router.route_generate("gato preto", temperature=0.1)
+        await router.route_generate("gato preto", temperature=0.9)
+        await router.route_generate("gato preto", model_id="vector", temperature=0.1)
+        await router.route_generate("gato preto", temperature=0.1, stream=True)
+        
+        assert model.calls == ["gato preto"] * 4
+    
+    @pytest.mark.asyncio
+    async def test_semantic_cache_falls_back_when_embed_fails(self, router):
+        """Testa se uma falha de embedding não derruba a geração com o cache semântico ligado."""
+        async def failing_embed(text):
+            raise RuntimeError("embed indisponível")
+        
+        router.get_model("mock").embed = failing_embed
+        router.semantic_cache = SemanticCache(router)
+        
+        assert await router.route_generate("prompt") == "mock"
+        assert await router.route_generate("prompt") == "mock"
+        assert len(router.semantic_cache._entries) == 0
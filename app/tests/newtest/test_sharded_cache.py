@@ -1,12 +1,24 @@
 # app/tests/newtest/test_sharded_cache.py - Versão corrigida
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
-import hashlib
 import pickle
 import asyncio
+import math
+import msgpack
 import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
 
-from app.core.sharded_cache import ShardedCache
+from app.core.sharded_cache import (
+    ShardedCache, FLUSH_BATCH_SIZE, hash64, hash_tag, jump_hash, rendezvous_hash,
+    serialize_value, deserialize_value, CACHE_FORMAT_VERSION, CACHE_FORMAT_ZSTD
+)
+
+async def _async_iter(items):
+    """Simula o iterador assíncrono retornado por scan_iter."""
+    for item in items:
+        yield item
 
 class TestShardedCache:
     @pytest.fixture
@@ -52,6 +64,69 @@ class TestShardedCache:
         shard2 = sharded_cache.get_shard("another-key")
         # Não podemos garantir que será diferente do primeiro, mas é uma possibilidade
     
+    def test_tenant_keys_share_shard(self, sharded_cache):
+        """Testa que chaves com a hash tag do tenant vão para o mesmo shard mesmo na estratégia 'key'."""
+        sharded_cache.strategy = "key"
+        
+        assert hash_tag("tenant:{tenant-1}:key1") == "tenant-1"
+        assert hash_tag("no-tag") == "no-tag"
+        assert hash_tag("empty:{}:tag") == "empty:{}:tag"
+        
+        shards = {
+            id(sharded_cache.get_shard(sharded_cache._make_key(f"key{i}", "tenant-1")))
+            for i in range(20)
+        }
+        assert len(shards) == 1
+    
+    def test_jump_hash_rebalance_bounded(self):
+        """Testa que adicionar um shard realoca no máximo ~K/N chaves, todas para o novo shard."""
+        key_count = 1000
+        key_hashes = [hash64(f"key-{i}") for i in range(key_count)]
+        
+        before = [jump_hash(h, 3) for h in key_hashes]
+        after = [jump_hash(h, 4) for h in key_hashes]
+        moved = [(old, new) for old, new in zip(before, after) if old != new]
+        
+        # Chaves só podem migrar para o shard recém-adicionado
+        assert all(new == 3 for _, new in moved)
+        assert len(moved) <= math.ceil(key_count / 4)
+        
+        # Todos os buckets devem ser usados e dentro do intervalo
+        assert set(after) == {0, 1, 2, 3}
+    
+    def test_rendezvous_removal_only_moves_removed_node_keys(self):
+        """Testa que remover um nó do meio só realoca as chaves que estavam nele."""
+        urls = [f"redis://node-{i}:6379" for i in range(4)]
+        key_hashes = [hash64(f"key-{i}") for i in range(1000)]
+        
+        seeds = [hash64(url) for url in urls]
+        before = [urls[rendezvous_hash(h, seeds)] for h in key_hashes]
+        
+        remaining = urls[:1] + urls[2:]
+        remaining_seeds = [hash64(url) for url in remaining]
+        after = [remaining[rendezvous_hash(h, remaining_seeds)] for h in key_hashes]
+        
+        for old, new in zip(before, after):
+            if old != urls[1]:
+                assert new == old
+        
+        # Distribuição razoável entre os nós
+        counts = {url: before.count(url) for url in urls}
+        assert min(counts.values()) > 150
+    
+    def test_get_shard_rendezvous(self, redis_nodes):
+        """Testa o roteamento com rendezvous hashing."""
+        urls = [f"redis://node-{i}:6379" for i in range(3)]
+        with patch('redis.asyncio.from_url', side_effect=redis_nodes):
+            cache = ShardedCache(urls, sharding_strategy="key", hash_algorithm="rendezvous")
+        
+        shard = cache.get_shard("specific-key")
+        assert shard == cache.get_shard("specific-key")
+        assert shard in redis_nodes
+        
+        with pytest.raises(ValueError):
+            ShardedCache(urls, hash_algorithm="modulo")
+    
     @pytest.mark.asyncio
     async def test_set_get(self, sharded_cache, redis_nodes):
         """Testa operações básicas de set e get."""
@@ -60,7 +135,7 @@ class TestShardedCache:
         
         # Criar funções assíncronas corretamente
         shard.set = AsyncMock(return_value=True)
-        shard.get = AsyncMock(return_value=pickle.dumps({"test": "data"}))
+        shard.get = AsyncMock(return_value=serialize_value({"test": "data"}))
         
         sharded_cache.get_shard = MagicMock(return_value=shard)
         
@@ -69,25 +144,114 @@ class TestShardedCache:
         result = await sharded_cache.set("test-key", value, ttl=300, tenant_id="tenant-1")
         assert result == True
         
+        # A chave gravada usa a hash tag do tenant e o valor está serializado em bytes
+        assert shard.set.call_args[0][0] == "tenant:{tenant-1}:test-key"
+        assert isinstance(shard.set.call_args[0][1], bytes)
+        
         # Testar get
         result = await sharded_cache.get("test-key", tenant_id="tenant-1")
         assert result == value
+    
+    @pytest.mark.asyncio
+    async def test_mset_mget_group_by_shard(self, sharded_cache, redis_nodes):
+        """Testa que mget/mset fazem uma única ida por shard e preservam a ordem."""
+        sharded_cache.strategy = "key"
+        store = {}
+        
+        for node in redis_nodes:
+            pipe = MagicMock()
+            pipe.set = MagicMock(side_effect=lambda key, value, ex: store.__setitem__(key, value))
+            pipe.execute = AsyncMock(return_value=[])
+            node.pipeline = MagicMock(return_value=pipe)
+            node.mget = AsyncMock(side_effect=lambda keys: [store.get(key) for key in keys])
+        
+        mapping = {f"key{i}": {"value": i} for i in range(20)}
+        assert await sharded_cache.mset(mapping, ttl=60) == True
+        
+        result = await sharded_cache.mget(["missing"] + list(mapping))
+        assert result == [None] + list(mapping.values())
+        
+        for node in redis_nodes:
+            if node.pipeline.called:
+                node.pipeline.return_value.execute.assert_awaited_once()
+            assert node.mget.await_count <= 1
+    
+    def test_serialization_roundtrip(self):
+        """Testa que tipos comuns sobrevivem à serialização do cache."""
+        value = {
+            "id": uuid.uuid4(),
+            "created_at": datetime(2025, 1, 21, 10, 30, tzinfo=timezone.utc),
+            "amount": Decimal("19.90"),
+            "tags": ["a", "b"],
+            "raw": b"\x00\x01"
+        }
+        
+        assert deserialize_value(serialize_value(value)) == value
+    
+    def test_serialization_compresses_large_values(self):
+        """Testa que só payloads grandes são comprimidos com zstd."""
+        small = {"name": "agent"}
+        large = {"messages": [{"role": "user", "content": "olá " * 20}] * 50}
+        
+        assert serialize_value(small).startswith(CACHE_FORMAT_VERSION)
+        
+        blob = serialize_value(large)
+        assert blob.startswith(CACHE_FORMAT_ZSTD)
+        assert len(blob) < len(msgpack.packb(large)) // 4
+        assert deserialize_value(blob) == large
+    
+    @pytest.mark.asyncio
+    async def test_get_rejects_legacy_pickle(self, sharded_cache):
+        """Testa que blobs antigos em pickle são tratados como ausentes."""
+        shard = MagicMock()
+        shard.get = AsyncMock(return_value=pickle.dumps({"test": "data"}))
+        sharded_cache.get_shard = MagicMock(return_value=shard)
+        
+        assert await sharded_cache.get("test-key", tenant_id="tenant-1") is None
 
     @pytest.mark.asyncio
     async def test_flush_tenant(self, sharded_cache, redis_nodes):
         """Testa limpeza de dados por tenant."""
         # Configurar mocks com funções async
-        keys = ["tenant:tenant-1:key1", "tenant:tenant-1:key2"]
+        keys = ["tenant:{tenant-1}:key1", "tenant:{tenant-1}:key2"]
         
         for node in redis_nodes:
-            node.keys = AsyncMock(return_value=keys)
-            node.delete = AsyncMock(return_value=len(keys))
+            node.scan_iter = MagicMock(side_effect=lambda **kwargs: _async_iter(keys))
+            pipe = MagicMock()
+            pipe.execute = AsyncMock(return_value=[len(keys)])
+            node.pipeline = MagicMock(return_value=pipe)
         
         # Chamar o método
         result = await sharded_cache.flush_tenant("tenant-1")
         
         # Verificar resultado
         assert result == True
+        for node in redis_nodes:
+            node.scan_iter.assert_called_once_with(match="tenant:{tenant-1}:*", count=500)
+            node.pipeline.assert_called_once_with(transaction=False)
+            pipe = node.pipeline.return_value
+            pipe.unlink.assert_called_once_with(*keys)
+            pipe.execute.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_flush_tenant_batches_unlink(self, sharded_cache, redis_nodes):
+        """Testa que chaves são removidas em lotes, com um pipeline executado por lote."""
+        keys = [f"tenant:{{tenant-1}}:key{i}" for i in range(FLUSH_BATCH_SIZE + 1)]
+        
+        for node in redis_nodes:
+            node.scan_iter = MagicMock(side_effect=lambda **kwargs: _async_iter(keys))
+            pipe = MagicMock()
+            pipe.execute = AsyncMock(return_value=[])
+            node.pipeline = MagicMock(return_value=pipe)
+        
+        assert await sharded_cache.flush_tenant("tenant-1") == True
+        
+        for node in redis_nodes:
+            pipe = node.pipeline.return_value
+            assert pipe.unlink.call_count == 2
+            assert pipe.unlink.call_args_list[0][0] == tuple(keys[:FLUSH_BATCH_SIZE])
+            assert pipe.unlink.call_args_list[1][0] == tuple(keys[FLUSH_BATCH_SIZE:])
+            assert pipe.execute.await_count == 2
 
 # tests/test_background_jobs.py
 from app.core.background_jobs import BackgroundJobQueue, Job, JobStatus
@@ -177,10 +341,12 @@ class TestBackgroundJobs:
         assert job.completed_at is not None
     
     @pytest.mark.asyncio
-    async def test_queue_enqueue(self, job_queue):
-        """Testa adição de job à fila."""
+    @pytest.mark.parametrize("scenario", ["enqueue", "get", "cancel"])
+    async def test_queue_scenarios(self, job_queue, scenario):
+        """Testa adição, consulta e cancelamento de jobs pelo mesmo caminho de enqueue."""
         # Função mock
         async def test_func():
+            await asyncio.sleep(1.0)
             return "OK"
         
         # Patch o método start para evitar iniciar o worker loop
@@ -192,50 +358,128 @@ class TestBackgroundJobs:
                 tenant_id="tenant-123"
             )
         
-        # Verificar
         assert job_id is not None
         assert job_id in job_queue.jobs
-        assert job_queue.jobs[job_id].tenant_id == "tenant-123"
         
-        # Verificar que start foi chamado porque queue não estava rodando
-        mock_start.assert_called_once()
+        if scenario == "enqueue":
+            assert job_queue.jobs[job_id].tenant_id == "tenant-123"
+            # Verificar que start foi chamado porque queue não estava rodando
+            mock_start.assert_called_once()
+        elif scenario == "get":
+            # Obter informações
+            job_info = job_queue.get_job(job_id)
+            assert job_info is not None
+            assert job_info["id"] == job_id
+            assert job_info["status"] == JobStatus.PENDING
+        elif scenario == "cancel":
+            # Cancelar
+            result = job_queue.cancel_job(job_id)
+            assert result is True
+            assert job_queue.jobs[job_id].status == JobStatus.CANCELLED
     
     @pytest.mark.asyncio
-    async def test_queue_get_job(self, job_queue):
-        """Testa obtenção de informações de um job."""
-        # Função mock
+    async def test_queue_runs_pending_jobs(self, job_queue):
+        """Testa que o worker consome os jobs pendentes e ignora os cancelados."""
+        async def test_func(value):
+            return value
+        
+        cancelled_id = await job_queue.enqueue(test_func, "cancelled", auto_start=False)
+        job_queue.cancel_job(cancelled_id)
+        job_id = await job_queue.enqueue(test_func, "OK")
+        
+        try:
+            job = job_queue.jobs[job_id]
+            for _ in range(100):
+                if job.status == JobStatus.COMPLETED:
+                    break
+                await asyncio.sleep(0.01)
+            
+            assert job.result == "OK"
+            assert job_queue.jobs[cancelled_id].status == JobStatus.CANCELLED
+            assert job_queue.jobs[cancelled_id].result is None
+        finally:
+            await job_queue.stop()
+    
+    @pytest.mark.asyncio
+    async def test_cancel_while_waiting_for_worker_slot(self):
+        """Testa que um job cancelado enquanto aguarda vaga no pool não é executado."""
+        job_queue = BackgroundJobQueue(max_workers=1)
+        release = asyncio.Event()
+        
+        async def slow_func():
+            await release.wait()
+            return "slow"
+        
         async def test_func():
             return "OK"
         
-        # Patch o método start para evitar iniciar o worker loop
-        with patch.object(job_queue, 'start', new_callable=AsyncMock):
-            # Adicionar à fila
-            job_id = await job_queue.enqueue(test_func)
+        slow_id = await job_queue.enqueue(slow_func)
+        waiting_id = await job_queue.enqueue(test_func)
         
-        # Obter informações
-        job_info = job_queue.get_job(job_id)
+        try:
+            # Deixa o worker retirar o segundo job da fila e bloquear no semáforo
+            await asyncio.sleep(0.05)
+            job_queue.cancel_job(waiting_id)
+            release.set()
+            
+            slow_job = job_queue.jobs[slow_id]
+            for _ in range(100):
+                if slow_job.status == JobStatus.COMPLETED:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            
+            waiting_job = job_queue.jobs[waiting_id]
+            assert slow_job.status == JobStatus.COMPLETED
+            assert waiting_job.status == JobStatus.CANCELLED
+            assert waiting_job.result is None
+            assert job_queue.get_stats()["cancelled"] == 1
+        finally:
+            await job_queue.stop()
+    
+    @pytest.mark.asyncio
+    async def test_queue_job_timeout(self, job_queue):
+        """Testa que a fila expira jobs lentos pela roda de timers."""
+        async def slow_func():
+            await asyncio.sleep(1.0)
+            return "Done"
+        
+        async def fast_func():
+            return "Done"
+        
+        slow_id = await job_queue.enqueue(slow_func, timeout=0.05)
+        fast_id = await job_queue.enqueue(fast_func, timeout=1.0)
         
-        # Verificar
-        assert job_info is not None
-        assert job_info["id"] == job_id
-        assert job_info["status"] == JobStatus.PENDING
+        try:
+            slow_job = job_queue.jobs[slow_id]
+            for _ in range(100):
+                if slow_job.status == JobStatus.FAILED:
+                    break
+                await asyncio.sleep(0.01)
+            
+            assert slow_job.status == JobStatus.FAILED
+            assert "Timeout" in slow_job.error
+            assert job_queue.jobs[fast_id].status == JobStatus.COMPLETED
+            assert job_queue._timeouts.size == 0
+        finally:
+            await job_queue.stop()
     
     @pytest.mark.asyncio
-    async def test_queue_cancel_job(self, job_queue):
-        """Testa cancelamento de um job."""
-        # Função mock
+    async def test_queue_stats_and_tenant_index(self, job_queue):
+        """Testa as contagens por status e a consulta de jobs por tenant."""
         async def test_func():
-            await asyncio.sleep(1.0)
             return "OK"
         
-        # Patch o método start para evitar iniciar o worker loop
-        with patch.object(job_queue, 'start', new_callable=AsyncMock):
-            # Adicionar à fila
-            job_id = await job_queue.enqueue(test_func)
+        first_id = await job_queue.enqueue(test_func, tenant_id="tenant-a", auto_start=False)
+        await job_queue.enqueue(test_func, tenant_id="tenant-a", auto_start=False)
+        await job_queue.enqueue(test_func, tenant_id="tenant-b", auto_start=False)
+        job_queue.cancel_job(first_id)
         
-        # Cancelar
-        result = job_queue.cancel_job(job_id)
+        stats = job_queue.get_stats()
+        assert stats["pending"] == 2
+        assert stats["cancelled"] == 1
+        assert stats["total"] == 3
         
-        # Verificar
-        assert result is True
-        assert job_queue.jobs[job_id].status == JobStatus.CANCELLED
\ No newline at end of file
+        assert len(job_queue.get_tenant_jobs("tenant-a")) == 2
+        assert [job["tenant_id"] for job in job_queue.get_tenant_jobs("tenant-b")] == ["tenant-b"]
+        assert job_queue.get_tenant_jobs("tenant-c") == []
@@ -1,70 +1,17 @@
 """
 Teste específico para o LLMRouter.
+
+Executar a partir da raiz do projeto: python -m app.tests.routertest
 """
-import os
-import sys
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Union, AsyncGenerator
+import time
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("router_test")
 
-# Adiciona o diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-backend_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
-if backend_dir not in sys.path:
-    sys.path.append(backend_dir)
-
-print(f"Path do Python: {sys.path}")
-
-# Importar o router e a classe base
-from app.llm.base import LLMBase
+# Importar o router e o LLM simulado
 from app.llm.router import LLMRouter
-
-# Criar uma implementação simulada de LLM para testes
-class MockLLM(LLMBase):
-    """Implementação simulada para testes."""
-    
-    def initialize(self) -> None:
-        """Inicializa o modelo."""
-        self.initialized = True
-        logger.info(f"Mock LLM inicializado: {self.model_name}")
-    
-    async def generate(self, 
-                  prompt: str, 
-                  max_tokens: Optional[int] = None,
-                  temperature: Optional[float] = None,
-                  stream: bool = False,
-                  **kwargs) -> Union[str, AsyncGenerator[str, None]]:
-        """Gera texto simulado."""
-        logger.info(f"Gerando texto com modelo {self.model_name} para prompt: {prompt[:30]}...")
-        await asyncio.sleep(0.5)  # Simula processamento
-        
-        if stream:
-            async def fake_stream():
-                tokens = ["Este", "é", "um", "texto", "simulado", "do", "modelo", self.model_name]
-                for token in tokens:
-                    await asyncio.sleep(0.1)
-                    yield token
-            return fake_stream()
-        else:
-            return f"Este é um texto simulado do modelo {self.model_name} para: {prompt[:20]}..."
-    
-    async def embed(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
-        """Cria embedding simulado."""
-        logger.info(f"Criando embedding com modelo {self.model_name}")
-        await asyncio.sleep(0.5)  # Simula processamento
-        
-        # Cria um vetor simulado de 10 dimensões
-        if isinstance(text, str):
-            return [0.1] * 10
-        else:
-            return [[0.1] * 10 for _ in text]
+from app.tests.fixtures.mock_llm import MockLLM
 
 async def test_router():
     """Testa o LLMRouter com modelos simulados."""
@@ -138,6 +85,31 @@ async def test_router():
         # Restaurar o modelo original
         router.models["modelo1"] = original_model
         
+        # Testando geração concorrente e em lote
+        print("\n7. Testando geração concorrente e em lote...")
+        prompts = [f"{prompt} ({i})" for i in range(32)]
+        
+        start_time = time.perf_counter()
+        responses = await asyncio.gather(*(model.generate(p) for p in prompts))
+        elapsed = time.perf_counter() - start_time
+        print(f"Fan-out com gather: {len(responses)} respostas em {elapsed:.2f}s ({len(responses) / elapsed:.1f} respostas/s)")
+        
+        start_time = time.perf_counter()
+        responses = await model.generate_batch(prompts)
+        elapsed = time.perf_counter() - start_time
+        print(f"Chamada em lote: {len(responses)} respostas em {elapsed:.2f}s ({len(responses) / elapsed:.1f} respostas/s)")
+        
+        start_time = time.perf_counter()
+        responses = await asyncio.gather(*(model.generate(p) for p in prompts))
+        elapsed = time.perf_counter() - start_time
+        print(f"Repetição com cache: {len(responses)} respostas em {elapsed * 1000:.2f}ms")
+        print(f"Cache de respostas do modelo1: {model.cache_stats()}")
+        
+        # Testando embeddings em lote via router
+        print("\n8. Testando embeddings em lote...")
+        embeddings = await router.embed_batch(prompts, batch_size=16)
+        print(f"{len(embeddings)} embeddings de {len(embeddings[0])} dimensões; primeiro: {embeddings[0][:5]}")
+        
         print("\nTodos os testes do router completados com sucesso!")
         
     except Exception as e:
@@ -150,4 +122,10 @@ async def test_router():
     print("="*80)
 
 if __name__ == "__main__":
+    # Configuração de logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     asyncio.run(test_router())
\ No newline at end of file
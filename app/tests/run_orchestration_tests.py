@@ -1,44 +1,162 @@
 # app/tests/run_orchestration_tests.py
+# Executar a partir da raiz do projeto: python -m app.tests.run_orchestration_tests
 import unittest
+from unittest.suite import _ErrorHolder
+import importlib
+import ast
+import glob
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-# Adicionar em app/tests/run_orchestration_tests.py após as importações
+# Diretório e pacote dos testes de orquestração
+TEST_DIR = 'app/tests/test_orchestration'
+TEST_PACKAGE = 'app.tests.test_orchestration'
 
-def run_tests_with_result():
-    """Executa todos os testes e retorna o resultado."""
+def _collect_file_test_ids(path):
+    """
+    Coleta estaticamente os ids 'modulo.Classe.metodo' de um arquivo de teste.
+    
+    Analisa a AST sem importar o módulo: considera classes que herdam de
+    TestCase (direta ou indiretamente, dentro do mesmo arquivo) e seus
+    métodos test*, na mesma ordem alfabética usada pelo TestLoader.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    
+    module_name = f"{TEST_PACKAGE}.{os.path.splitext(os.path.basename(path))[0]}"
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    test_classes = set()
+    
+    def base_name(base):
+        return base.attr if isinstance(base, ast.Attribute) else getattr(base, "id", None)
+    
+    # Propagar a herança de TestCase entre classes do próprio arquivo
+    changed = True
+    while changed:
+        changed = False
+        for name, node in classes.items():
+            if name not in test_classes and any(
+                base_name(base) in ("TestCase", "IsolatedAsyncioTestCase") or base_name(base) in test_classes
+                for base in node.bases
+            ):
+                test_classes.add(name)
+                changed = True
+    
+    test_ids = []
+    for name in sorted(test_classes):
+        methods = {
+            item.name for item in classes[name].body
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test")
+        }
+        test_ids.extend(f"{module_name}.{name}.{method}" for method in sorted(methods))
+    
+    return test_ids
+
+def collect_test_ids():
+    """Coleta os ids de todos os testes de orquestração sem importá-los."""
+    test_ids = []
+    for path in sorted(glob.glob(os.path.join(TEST_DIR, 'test_*.py'))):
+        test_ids.extend(_collect_file_test_ids(path))
+    return test_ids
+
+def discover_tests():
+    """Monta a suíte de testes de orquestração a partir dos ids coletados."""
     test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover('app/tests/test_orchestration', pattern='test_*.py')
+    return test_loader.loadTestsFromNames(collect_test_ids())
+
+def _run_test_chunk(test_ids):
+    """
+    Executa um lote de testes (em um processo do pool).
+    
+    Returns:
+        Saída do runner e resultado em formato serializável
+    """
+    stream = io.StringIO()
+    suite = unittest.TestLoader().loadTestsFromNames(test_ids)
+    result = unittest.TextTestRunner(stream=stream, verbosity=2).run(suite)
     
-    test_runner = unittest.TextTestRunner(verbosity=2)
-    result = test_runner.run(test_suite)
+    return {
+        "output": stream.getvalue(),
+        "tests_run": result.testsRun,
+        "errors": [(test.id(), traceback) for test, traceback in result.errors],
+        "failures": [(test.id(), traceback) for test, traceback in result.failures],
+        "skipped": [(test.id(), reason) for test, reason in result.skipped],
+        "expected_failures": [(test.id(), traceback) for test, traceback in result.expectedFailures],
+        "unexpected_successes": [test.id() for test in result.unexpectedSuccesses]
+    }
+
+def _chunk_by_module(test_ids, workers):
+    """
+    Divide os testes em até `workers` lotes sem separar um mesmo módulo,
+    para que setUpClass/setUpModule rodem uma única vez por módulo.
+    """
+    modules = {}
+    for test_id in test_ids:
+        module_name = test_id.rsplit(".", 2)[0]
+        modules.setdefault(module_name, []).append(test_id)
+    
+    # Distribui os maiores módulos primeiro no lote com menos testes
+    chunks = [[] for _ in range(min(workers, len(modules)))]
+    for module_ids in sorted(modules.values(), key=len, reverse=True):
+        min(chunks, key=len).extend(module_ids)
+    return chunks
+
+def run_parallel(test_ids, workers=None):
+    """
+    Executa os testes em paralelo, um lote por processo.
+    
+    Args:
+        test_ids: Ids 'modulo.Classe.metodo' dos testes
+        workers: Número de processos (padrão: número de CPUs)
+        
+    Returns:
+        unittest.TestResult agregado; os testes vêm de outros processos, então
+        cada entrada é um _ErrorHolder com o id do teste no lugar do TestCase
+    """
+    chunks = _chunk_by_module(test_ids, workers or os.cpu_count() or 1)
+    
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            chunk_results = list(executor.map(_run_test_chunk, chunks))
+    else:
+        chunk_results = [_run_test_chunk(chunk) for chunk in chunks]
+    
+    result = unittest.TestResult()
+    for chunk_result in chunk_results:
+        sys.stderr.write(chunk_result["output"])
+        result.testsRun += chunk_result["tests_run"]
+        result.errors.extend((_ErrorHolder(test_id), tb) for test_id, tb in chunk_result["errors"])
+        result.failures.extend((_ErrorHolder(test_id), tb) for test_id, tb in chunk_result["failures"])
+        result.skipped.extend((_ErrorHolder(test_id), reason) for test_id, reason in chunk_result["skipped"])
+        result.expectedFailures.extend(
+            (_ErrorHolder(test_id), tb) for test_id, tb in chunk_result["expected_failures"]
+        )
+        result.unexpectedSuccesses.extend(_ErrorHolder(test_id) for test_id in chunk_result["unexpected_successes"])
     
     return result
 
+def run_tests_with_result():
+    """Executa todos os testes e retorna o resultado."""
+    return run_parallel(collect_test_ids())
+
 def run_specific_test(test_module_name):
     """Executa um módulo de teste específico."""
     print(f"\nExecutando teste específico: {test_module_name}\n")
     
     try:
-        module = __import__(f"app.tests.test_orchestration.{test_module_name}")
-        module_tests = getattr(module.tests.test_orchestration, test_module_name)
+        module_tests = importlib.import_module(f"{TEST_PACKAGE}.{test_module_name}")
         
         test_loader = unittest.TestLoader()
         test_suite = test_loader.loadTestsFromModule(module_tests)
         
         test_runner = unittest.TextTestRunner(verbosity=2)
         return test_runner.run(test_suite)
-    except (ImportError, AttributeError) as e:
+    except ImportError as e:
         print(f"Erro ao importar módulo de teste: {str(e)}")
         return None
 
-# Adicionar o diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-root_dir = os.path.dirname(parent_dir)
-if root_dir not in sys.path:
-    sys.path.append(root_dir)
-
 # Descobrir e executar todos os testes
 def run_tests():
     """Executa todos os testes de orquestração."""
@@ -47,12 +165,10 @@ def run_tests():
     print("=" * 80 + "\n")
     
     # Descobrir testes - apenas em test_orchestration
-    test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover('app/tests/test_orchestration', pattern='test_*.py')
+    test_ids = collect_test_ids()
     
-    # Executar testes
-    test_runner = unittest.TextTestRunner(verbosity=2)
-    result = test_runner.run(test_suite)
+    # Executar testes, um lote de módulos por processo
+    result = run_parallel(test_ids)
     
     print("\n" + "=" * 80)
     print(f" RESULTADO: {result.testsRun} testes executados, {len(result.errors)} erros, {len(result.failures)} falhas ".center(80, "="))
@@ -1,22 +1,14 @@
 """
 Teste simplificado para a infraestrutura LLM
+
+Executar a partir da raiz do projeto: python -m app.tests.simple_llm_test
 """
 import os
 import sys
 import logging
-import asyncio
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Adicionar diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-root_dir = os.path.dirname(parent_dir)
-if root_dir not in sys.path:
-    sys.path.append(root_dir)
-
 # Configurar variável de ambiente para SECRET_KEY
 os.environ["SECRET_KEY"] = "test_secret_key"
 
@@ -57,8 +49,12 @@ class SimpleLLMTest:
             return False
 
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
+    # Configuração de logging
+    logging.basicConfig(level=logging.INFO)
+    
+    from app.tests.fixtures.runner import run_async
+    
     test = SimpleLLMTest()
-    result = loop.run_until_complete(test.run())
+    result = run_async(test.run())
     if not result:
         sys.exit(1)
\ No newline at end of file
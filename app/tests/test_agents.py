@@ -1,17 +1,14 @@
 # app/tests/test_agents.py
 import unittest
 import asyncio
-import os
-import sys
 from typing import Dict, Any, List
-import uuid
+import itertools
 from datetime import datetime
+from collections import defaultdict
 import json
+import operator
 
-# Adicionar diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-sys.path.append(parent_dir)
+from sqlalchemy.sql import elements, operators as sql_operators
 
 # Importar componentes para teste
 from app.agents.base import BaseAgent, AgentState
@@ -22,10 +19,20 @@ from app.agents.finance import FinanceAgent
 from app.models.agent import Agent, AgentType
 from app.models.template import Template, TemplateDepartment
 
+# Timestamp fixo compartilhado pelos mocks (datetime é imutável)
+_NOW = datetime.utcnow()
+
+# IDs determinísticos para os mocks (não precisam de aleatoriedade criptográfica)
+_id_counter = itertools.count()
+
+def _fake_id(prefix: str) -> str:
+    """Gera um ID sequencial com o prefixo informado."""
+    return f"{prefix}-{next(_id_counter):08x}"
+
 # Definir classes de teste simuladas
 class MockTemplate:
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.id = kwargs.get("id", _fake_id("tpl"))
         self.name = kwargs.get("name", "Mock Template")
         self.description = kwargs.get("description", "Descrição do template simulado")
         self.department = kwargs.get("department", TemplateDepartment.CUSTOM)
@@ -33,13 +40,13 @@ class MockTemplate:
         self.prompt_template = kwargs.get("prompt_template", "Você é um assistente para {{especialidade}}.")
         self.tools_config = kwargs.get("tools_config", {})
         self.llm_config = kwargs.get("llm_config", {})
-        self.created_at = kwargs.get("created_at", datetime.utcnow())
-        self.updated_at = kwargs.get("updated_at", datetime.utcnow())
+        self.created_at = kwargs.get("created_at", _NOW)
+        self.updated_at = kwargs.get("updated_at", _NOW)
         self.user_id = kwargs.get("user_id", None)
 
 class MockAgent:
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.id = kwargs.get("id", _fake_id("agent"))
         self.name = kwargs.get("name", "Mock Agent")
         self.description = kwargs.get("description", "Descrição do agente simulado")
         self.user_id = kwargs.get("user_id", "user123")
@@ -47,23 +54,36 @@ class MockAgent:
         self.configuration = kwargs.get("configuration", {})
         self.template_id = kwargs.get("template_id", None)
         self.is_active = kwargs.get("is_active", True)
-        self.created_at = kwargs.get("created_at", datetime.utcnow())
-        self.updated_at = kwargs.get("updated_at", datetime.utcnow())
+        self.created_at = kwargs.get("created_at", _NOW)
+        self.updated_at = kwargs.get("updated_at", _NOW)
         self.template = kwargs.get("template", None)
 
+def _model_name(model):
+    """Nome usado para agrupar registros: MockAgent e Agent caem em 'agent'."""
+    name = model.__name__.lower()
+    return name[len("mock"):] if name.startswith("mock") else name
+
+# Valores das constantes SQL que aparecem em filtros como `coluna == True`
+_SQL_CONSTANTS = {elements.True_: True, elements.False_: False, elements.Null: None}
+
 class MockDB:
     """Mock para simulação do banco de dados"""
+    # Atributos com índice secundário (valor -> ids), usados pelos filtros de igualdade
+    INDEXED_ATTRS = ("user_id", "type")
+    
     def __init__(self):
-        self.data = {}
+        self.rows: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        self.index: Dict[tuple, Dict[Any, List[str]]] = defaultdict(lambda: defaultdict(list))
     
     def query(self, model):
         return MockQuery(self, model)
     
     def add(self, obj):
-        model_name = obj.__class__.__name__.lower()
-        if model_name not in self.data:
-            self.data[model_name] = []
-        self.data[model_name].append(obj)
+        model_name = _model_name(obj.__class__)
+        self.rows[model_name][obj.id] = obj
+        for attr in self.INDEXED_ATTRS:
+            if hasattr(obj, attr):
+                self.index[(model_name, attr)][getattr(obj, attr)].append(obj.id)
     
     def commit(self):
         pass
@@ -76,20 +96,48 @@ class MockQuery:
     def __init__(self, db, model):
         self.db = db
         self.model = model
+        self.model_name = _model_name(model)
         self.filters = []
     
     def filter(self, *args):
-        self.filters.extend(args)
+        for expression in args:
+            # Apenas comparações simples coluna/valor são aplicadas; o resto é ignorado
+            if isinstance(expression, elements.BinaryExpression) and hasattr(expression.left, "key"):
+                right = expression.right
+                value = getattr(right, "value", _SQL_CONSTANTS.get(type(right)))
+                self.filters.append((expression.left.key, expression.operator, value))
         return self
     
+    def _matching(self):
+        rows = self.db.rows.get(self.model_name, {})
+        candidate_ids = None
+        predicates = []
+        
+        for attr, op, value in self.filters:
+            if op is operator.eq and attr in MockDB.INDEXED_ATTRS:
+                ids = set(self.db.index[(self.model_name, attr)].get(value, ()))
+                candidate_ids = ids if candidate_ids is None else candidate_ids & ids
+            else:
+                predicates.append((attr, op, value))
+        
+        objects = rows.values() if candidate_ids is None else (rows[i] for i in rows if i in candidate_ids)
+        for obj in objects:
+            if all(_apply_operator(op, getattr(obj, attr, None), value) for attr, op, value in predicates):
+                yield obj
+    
     def first(self):
-        model_name = self.model.__name__.lower()
-        items = self.db.data.get(model_name, [])
-        return items[0] if items else None
+        return next(self._matching(), None)
     
     def all(self):
-        model_name = self.model.__name__.lower()
-        return self.db.data.get(model_name, [])
+        return list(self._matching())
+
+def _apply_operator(op, left, right):
+    """Avalia o operador de uma expressão SQLAlchemy sobre valores Python."""
+    if op is sql_operators.is_:
+        return left is right
+    if op is sql_operators.is_not:
+        return left is not right
+    return op(left, right)
 
 class TestAgentState(unittest.TestCase):
     """Testes para a classe AgentState"""
@@ -135,13 +183,13 @@ class TestAgentState(unittest.TestCase):
         self.state.set_priority("speed", 7)
         
         # Verificar se as prioridades foram definidas
-        priorities = {p["name"]: p["value"] for p in self.state.memory["priorities"]}
+        priorities = self.state.memory["priorities"]
         self.assertEqual(priorities["accuracy"], 9)
         self.assertEqual(priorities["speed"], 7)
         
         # Atualizar uma prioridade existente
         self.state.set_priority("accuracy", 8)
-        priorities = {p["name"]: p["value"] for p in self.state.memory["priorities"]}
+        priorities = self.state.memory["priorities"]
         self.assertEqual(priorities["accuracy"], 8)
 
 class TestBaseAgent(unittest.TestCase):
@@ -348,7 +396,7 @@ class TestDepartmentAgents(unittest.TestCase):
         self.assertEqual(self.marketing_agent.channels, ["instagram", "facebook"])
         
         # Verificar prioridades
-        priorities = {p["name"]: p["value"] for p in self.marketing_agent.state.memory["priorities"]}
+        priorities = self.marketing_agent.state.memory["priorities"]
         self.assertIn("creativity", priorities)
         self.assertIn("audience_understanding", priorities)
     
@@ -359,7 +407,7 @@ class TestDepartmentAgents(unittest.TestCase):
         self.assertEqual(self.sales_agent.products, ["produto A", "produto B"])
         
         # Verificar prioridades
-        priorities = {p["name"]: p["value"] for p in self.sales_agent.state.memory["priorities"]}
+        priorities = self.sales_agent.state.memory["priorities"]
         self.assertIn("customer_satisfaction", priorities)
         self.assertIn("closing_ability", priorities)
     
@@ -370,7 +418,7 @@ class TestDepartmentAgents(unittest.TestCase):
         self.assertEqual(self.finance_agent.currency, "BRL")
         
         # Verificar prioridades
-        priorities = {p["name"]: p["value"] for p in self.finance_agent.state.memory["priorities"]}
+        priorities = self.finance_agent.state.memory["priorities"]
         self.assertIn("accuracy", priorities)
         self.assertIn("compliance", priorities)
 
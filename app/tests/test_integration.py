@@ -1,17 +1,13 @@
 # app/tests/test_integration.py
-import unittest
+import pytest
 import asyncio
-import os
-import sys
 from typing import Dict, Any, List
-import uuid
+import itertools
 from datetime import datetime
 import json
-
-# Adicionar diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-sys.path.append(parent_dir)
+import operator
+from collections import defaultdict
+from types import SimpleNamespace
 
 # Importar componentes para teste
 from app.agents.base import BaseAgent, AgentState
@@ -28,11 +24,26 @@ from app.models.template import Template, TemplateDepartment
 from app.models.conversation import Conversation, ConversationStatus
 from app.models.message import Message, MessageRole
 from app.core.mcp import MCPFormatter, MCPResponseProcessor
+from sqlalchemy.sql import elements
+
+# Timestamp fixo e IDs sequenciais para os mocks (sem uuid4/utcnow por objeto)
+_DEFAULT_NOW = datetime.utcnow()
+_id_counter = itertools.count()
+
+def _fake_id(prefix: str) -> str:
+    """Gera um ID sequencial com o prefixo informado."""
+    return f"{prefix}-{next(_id_counter):08x}"
+
+# Valores da configuração do agente que devem aparecer no template renderizado
+EXPECTED_RENDERED_VALUES = (
+    "Empresa ABC", "Instagram", "casual", "Tecnologia",
+    "Profissionais de TI", "Inovação e qualidade", "engajamento"
+)
 
 # Classes de simulação para testes
 class MockTemplate:
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.id = kwargs.get("id") or _fake_id("tpl")
         self.name = kwargs.get("name", "Mock Template")
         self.description = kwargs.get("description", "Descrição do template simulado")
         self.department = kwargs.get("department", TemplateDepartment.CUSTOM)
@@ -40,13 +51,13 @@ class MockTemplate:
         self.prompt_template = kwargs.get("prompt_template", "Você é um assistente para {{especialidade}}.")
         self.tools_config = kwargs.get("tools_config", {})
         self.llm_config = kwargs.get("llm_config", {})
-        self.created_at = kwargs.get("created_at", datetime.utcnow())
-        self.updated_at = kwargs.get("updated_at", datetime.utcnow())
+        self.created_at = kwargs.get("created_at", _DEFAULT_NOW)
+        self.updated_at = kwargs.get("updated_at", _DEFAULT_NOW)
         self.user_id = kwargs.get("user_id", None)
 
 class MockAgent:
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.id = kwargs.get("id") or _fake_id("agent")
         self.name = kwargs.get("name", "Mock Agent")
         self.description = kwargs.get("description", "Descrição do agente simulado")
         self.user_id = kwargs.get("user_id", "user123")
@@ -54,43 +65,49 @@ class MockAgent:
         self.configuration = kwargs.get("configuration", {})
         self.template_id = kwargs.get("template_id", None)
         self.is_active = kwargs.get("is_active", True)
-        self.created_at = kwargs.get("created_at", datetime.utcnow())
-        self.updated_at = kwargs.get("updated_at", datetime.utcnow())
+        self.created_at = kwargs.get("created_at", _DEFAULT_NOW)
+        self.updated_at = kwargs.get("updated_at", _DEFAULT_NOW)
         self.template = kwargs.get("template", None)
 
 class MockConversation:
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.id = kwargs.get("id") or _fake_id("conv")
         self.title = kwargs.get("title", "Conversa de Teste")
         self.user_id = kwargs.get("user_id", "user123")
         self.agent_id = kwargs.get("agent_id", None)
         self.status = kwargs.get("status", ConversationStatus.ACTIVE)
         self.metadata = kwargs.get("metadata", {})
-        self.created_at = kwargs.get("created_at", datetime.utcnow())
-        self.updated_at = kwargs.get("updated_at", datetime.utcnow())
+        self.created_at = kwargs.get("created_at", _DEFAULT_NOW)
+        self.updated_at = kwargs.get("updated_at", _DEFAULT_NOW)
 
 class MockMessage:
     def __init__(self, **kwargs):
-        self.id = kwargs.get("id", str(uuid.uuid4()))
+        self.id = kwargs.get("id") or _fake_id("msg")
         self.conversation_id = kwargs.get("conversation_id", None)
         self.role = kwargs.get("role", MessageRole.HUMAN)
         self.content = kwargs.get("content", "Mensagem de teste")
         self.metadata = kwargs.get("metadata", {})
-        self.created_at = kwargs.get("created_at", datetime.utcnow())
+        self.created_at = kwargs.get("created_at", _DEFAULT_NOW)
+
+def _model_name(model):
+    """Nome usado para agrupar registros: MockAgent e Agent caem em 'agent'."""
+    name = model.__name__.lower()
+    return name[len("mock"):] if name.startswith("mock") else name
+
+# Valores das constantes SQL que aparecem em filtros como `coluna == True`
+_SQL_CONSTANTS = {elements.True_: True, elements.False_: False, elements.Null: None}
 
 class MockDB:
     """Mock para simulação do banco de dados"""
     def __init__(self):
-        self.data = {}
+        # Registros por modelo, indexados por id (ordem de inserção preservada)
+        self.data: Dict[str, Dict[Any, Any]] = defaultdict(dict)
     
     def query(self, model):
         return MockQuery(self, model)
     
     def add(self, obj):
-        model_name = obj.__class__.__name__.lower()
-        if model_name not in self.data:
-            self.data[model_name] = []
-        self.data[model_name].append(obj)
+        self.data[_model_name(obj.__class__)][obj.id] = obj
     
     def commit(self):
         pass
@@ -103,62 +120,94 @@ class MockQuery:
     def __init__(self, db, model):
         self.db = db
         self.model = model
+        self.rows = db.data[_model_name(model)]
         self.filters = []
     
     def filter(self, *args):
-        self.filters.extend(args)
+        for expression in args:
+            # Apenas comparações simples coluna/valor são aplicadas; o resto é ignorado
+            if isinstance(expression, elements.BinaryExpression) and hasattr(expression.left, "key"):
+                right = expression.right
+                value = getattr(right, "value", _SQL_CONSTANTS.get(type(right)))
+                self.filters.append((expression.left.key, expression.operator, value))
         return self
     
+    def _matching(self):
+        rows = self.rows
+        predicates = []
+        candidates = rows.values()
+        
+        for attr, op, value in self.filters:
+            if attr == "id" and op is operator.eq:
+                # Busca direta pelo id em vez de varrer a tabela
+                candidates = [rows[value]] if value in rows else []
+            else:
+                predicates.append((attr, op, value))
+        
+        for obj in candidates:
+            if all(op(getattr(obj, attr, None), value) for attr, op, value in predicates):
+                yield obj
+    
     def first(self):
-        model_name = self.model.__name__.lower()
-        items = self.db.data.get(model_name, [])
-        return items[0] if items else None
+        if not self.filters:
+            return next(iter(self.rows.values()), None)
+        return next(self._matching(), None)
     
     def all(self):
-        model_name = self.model.__name__.lower()
-        return self.db.data.get(model_name, [])
+        if not self.filters:
+            return list(self.rows.values())
+        return list(self._matching())
 
 # Mock dos componentes MCP
 class MockMCPFormatter(MCPFormatter):
+    # Partes constantes do contexto, montadas uma vez (somente leitura pelos agentes)
+    _CONTEXT_SKELETON = {
+        "messages": [
+            {"role": "system", "content": "Você é um assistente útil"},
+            {"role": "user", "content": "Olá, como você está?"},
+            {"role": "assistant", "content": "Estou bem, como posso ajudar?"}
+        ],
+        "tools": [
+            {"name": "search", "description": "Pesquisa na web"},
+            {"name": "calculator", "description": "Executa cálculos matemáticos"}
+        ],
+        "memory": {
+            "facts": ["Fato 1", "Fato 2"],
+            "recent_actions": []
+        }
+    }
+    
     def format_conversation_context(self, db, agent, conversation, max_messages=50, include_tools=True):
         """Versão simplificada para testes"""
-        return {
-            "messages": [
-                {"role": "system", "content": "Você é um assistente útil"},
-                {"role": "user", "content": "Olá, como você está?"},
-                {"role": "assistant", "content": "Estou bem, como posso ajudar?"}
-            ],
-            "tools": [
-                {"name": "search", "description": "Pesquisa na web"},
-                {"name": "calculator", "description": "Executa cálculos matemáticos"}
-            ],
-            "metadata": {
-                "agent_id": agent.id,
-                "agent_name": agent.name,
-                "conversation_id": conversation.id
-            },
-            "memory": {
-                "facts": ["Fato 1", "Fato 2"],
-                "recent_actions": []
-            }
+        # Cópia rasa: os agentes só alteram "metadata", que é novo a cada chamada
+        context = dict(self._CONTEXT_SKELETON)
+        context["metadata"] = {
+            "agent_id": agent.id,
+            "agent_name": agent.name,
+            "conversation_id": conversation.id
         }
+        return context
 
 class MockMCPProcessor(MCPResponseProcessor):
+    # Ações e validação fixas, compartilhadas entre chamadas (somente leitura)
+    _ACTIONS = (
+        {
+            "name": "search",
+            "params": {"query": "teste"}
+        },
+    )
+    _VALIDATION = {
+        "is_valid": True,
+        "warnings": []
+    }
+    
     def process_response(self, response: str) -> Dict[str, Any]:
         """Versão simplificada para testes"""
         return {
             "content": response,
             "filtered_content": response,
-            "actions": [
-                {
-                    "name": "search",
-                    "params": {"query": "teste"}
-                }
-            ],
-            "validation": {
-                "is_valid": True,
-                "warnings": []
-            }
+            "actions": self._ACTIONS,
+            "validation": self._VALIDATION
         }
 
 # Versão de teste do BaseAgent que não depende de LLM real
@@ -184,12 +233,12 @@ class TestBaseAgent(BaseAgent):
         processed_response["action_results"] = action_results
         
         # Criar uma mensagem simulada
-        message_id = str(uuid.uuid4())
+        message_id = _fake_id("msg")
         processed_response["message"] = {
             "id": message_id,
             "content": processed_response["filtered_content"],
             "role": "assistant",
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": _DEFAULT_NOW.isoformat()
         }
         
         # Atualizar estado
@@ -197,265 +246,267 @@ class TestBaseAgent(BaseAgent):
         
         return processed_response
 
-class TestAgentTemplateIntegration(unittest.TestCase):
-    """Testes de integração entre agentes e templates"""
+@pytest.fixture(autouse=True)
+def offline_llm(monkeypatch):
+    """
+    Substitui a geração via LLM por uma resposta fixa.
     
-    def setUp(self):
-        self.db = MockDB()
-        self.template_manager = TemplateManager()
-        
-        # Configurar mocks para MCP
-        self.mcp_formatter = MockMCPFormatter()
-        self.mcp_processor = MockMCPProcessor()
-        
-        # Carregar um template de marketing
-        marketing_templates = get_default_marketing_templates()
-        self.marketing_template_data = marketing_templates[0]
-        
-        # Criar template simulado
-        self.template = MockTemplate(
-            name=self.marketing_template_data["name"],
-            department=self.marketing_template_data["department"],
-            prompt_template=self.marketing_template_data["prompt_template"],
-            tools_config=self.marketing_template_data["tools_config"],
-            llm_config=self.marketing_template_data["llm_config"]
-        )
-        
-        # Processar o template
-        self.processed_template = self.template_manager.load_template(self.template)
-        
-        # Criar agente com o template
-        self.agent_record = MockAgent(
-            name="Agente de Marketing",
-            type=AgentType.MARKETING,
-            template=self.template,
-            configuration={
-                "company_name": "Empresa ABC",
-                "primary_platform": "Instagram",
-                "brand_tone": "casual",
-                "industry": "Tecnologia",
-                "target_audience": "Profissionais de TI",
-                "differentials": "Inovação e qualidade",
-                "metric_priority": "engajamento"
-            }
-        )
-        
-        # Criar conversa simulada
-        self.conversation = MockConversation(
-            agent_id=self.agent_record.id
-        )
-        
-        # Adicionar ao "banco de dados"
-        self.db.add(self.agent_record)
-        self.db.add(self.conversation)
-        
-        # Criar agente de teste
-        self.agent = TestBaseAgent(
-            self.db, 
-            self.agent_record,
-            mcp_formatter=self.mcp_formatter,
-            mcp_processor=self.mcp_processor
-        )
+    O SupervisorAgent usa o _generate_response real, que chama o smart router e
+    espera pelo servidor HTTP de LLM (timeouts de rede) mesmo nos testes.
+    """
+    async def _generate_response(self, prompt: str) -> str:
+        return f"Resposta simulada para o prompt de {len(prompt)} caracteres"
+    
+    monkeypatch.setattr(BaseAgent, "_generate_response", _generate_response)
+
+@pytest.fixture(autouse=True)
+def skip_fact_extraction(monkeypatch):
+    """A extração de fatos é coberta em test_agents.py; aqui não é verificada."""
+    monkeypatch.setattr(BaseAgent, "extract_facts", lambda self, text: [])
+
+@pytest.fixture(scope="session")
+def marketing_template_data():
+    """Primeiro template padrão de marketing (dados puros, carregados uma vez)."""
+    return get_default_marketing_templates()[0]
+
+@pytest.fixture
+def mcp_mocks():
+    """Formatador e processador MCP simulados."""
+    return SimpleNamespace(formatter=MockMCPFormatter(), processor=MockMCPProcessor())
+
+@pytest.fixture(scope="module")
+def template_env(marketing_template_data):
+    """Template de marketing processado e agente configurado, construídos uma vez por módulo."""
+    template_manager = TemplateManager()
+    
+    # Criar template simulado
+    template = MockTemplate(
+        name=marketing_template_data["name"],
+        department=marketing_template_data["department"],
+        prompt_template=marketing_template_data["prompt_template"],
+        tools_config=marketing_template_data["tools_config"],
+        llm_config=marketing_template_data["llm_config"]
+    )
+    
+    # Criar agente com o template
+    agent_record = MockAgent(
+        name="Agente de Marketing",
+        type=AgentType.MARKETING,
+        template=template,
+        configuration={
+            "company_name": "Empresa ABC",
+            "primary_platform": "Instagram",
+            "brand_tone": "casual",
+            "industry": "Tecnologia",
+            "target_audience": "Profissionais de TI",
+            "differentials": "Inovação e qualidade",
+            "metric_priority": "engajamento"
+        }
+    )
     
-    async def test_agent_template_workflow(self):
+    return SimpleNamespace(
+        template_manager=template_manager,
+        template=template,
+        processed_template=template_manager.load_template(template),
+        agent_record=agent_record
+    )
+
+@pytest.fixture
+def agent_env(template_env, mcp_mocks):
+    """Banco simulado, conversa e agente novos por teste (o estado do agente é mutável)."""
+    db = MockDB()
+    conversation = MockConversation(agent_id=template_env.agent_record.id)
+    
+    # Adicionar ao "banco de dados"
+    db.add(template_env.agent_record)
+    db.add(conversation)
+    
+    agent = TestBaseAgent(
+        db,
+        template_env.agent_record,
+        mcp_formatter=mcp_mocks.formatter,
+        mcp_processor=mcp_mocks.processor
+    )
+    
+    return SimpleNamespace(db=db, conversation=conversation, agent=agent)
+
+class TestAgentTemplateIntegration:
+    """Testes de integração entre agentes e templates"""
+    
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_agent_template_workflow(self, agent_env):
         """Testa o fluxo completo de processamento de mensagem usando template"""
         # Mensagem de teste
         test_message = "Precisamos melhorar nossa presença no Instagram. Como podemos aumentar o engajamento?"
         
         # Processar a mensagem
-        response = await self.agent.process_message(
-            conversation_id=self.conversation.id,
+        response = await agent_env.agent.process_message(
+            conversation_id=agent_env.conversation.id,
             message=test_message
         )
         
         # Verificar a resposta
-        self.assertIn("message", response)
-        self.assertIn("actions", response)
+        assert "message" in response
+        assert "actions" in response
         
         # Verificar se o estado foi atualizado
-        self.assertEqual(self.agent.state.status, "idle")
+        assert agent_env.agent.state.status == "idle"
         
         # Verificar se ações foram processadas
-        self.assertIn("action_results", response)
+        assert "action_results" in response
     
-    def test_template_variable_extraction(self):
+    def test_template_variable_extraction(self, template_env):
         """Testa a extração de variáveis do template"""
         # Verificar se o template contém as variáveis esperadas
-        variables = self.processed_template["variables"]
+        variables = template_env.processed_template["variables"]
         
         # Variáveis esperadas do template de marketing
-        expected_vars = [
+        expected_vars = {
             "company_name", "primary_platform", "brand_tone", 
             "industry", "target_audience", "differentials", 
             "metric_priority"
-        ]
+        }
         
-        for var in expected_vars:
-            self.assertIn(var, variables)
+        missing = expected_vars - variables.keys()
+        assert not missing, missing
     
-    def test_agent_template_configuration(self):
+    def test_agent_template_configuration(self, template_env):
         """Testa se a configuração do agente corresponde às variáveis do template"""
         # Verificar se todas as variáveis do template estão na configuração do agente
-        variables = self.processed_template["variables"]
+        variables = template_env.processed_template["variables"]
         
-        for var_name in variables:
-            self.assertIn(var_name, self.agent_record.configuration)
+        missing = variables.keys() - template_env.agent_record.configuration.keys()
+        assert not missing, missing
     
-    def test_template_rendering(self):
+    def test_template_rendering(self, template_env):
         """Testa se o template é renderizado corretamente com as configurações do agente"""
         # Renderizar o template com as configurações do agente
-        rendered = self.template_manager.render_template(
-            self.template.id,
-            self.agent_record.configuration
+        rendered = template_env.template_manager.render_template(
+            template_env.template.id,
+            template_env.agent_record.configuration
         )
         
         # Verificar se a substituição foi feita corretamente
-        self.assertIn("Empresa ABC", rendered)
-        self.assertIn("Instagram", rendered)
-        self.assertIn("casual", rendered)
-        self.assertIn("Tecnologia", rendered)
-        self.assertIn("Profissionais de TI", rendered)
-        self.assertIn("Inovação e qualidade", rendered)
-        self.assertIn("engajamento", rendered)
+        missing = [value for value in EXPECTED_RENDERED_VALUES if value not in rendered]
+        assert not missing, missing
+
+@pytest.fixture(scope="module")
+def department_records():
+    """Templates e registros de agentes por departamento, construídos uma vez por módulo."""
+    # Criar templates para os diferentes tipos de agentes
+    supervisor_template = MockTemplate(
+        name="Template Supervisor",
+        department=TemplateDepartment.SUPERVISOR,
+        prompt_template="Você é um agente supervisor que coordena outros agentes."
+    )
+    
+    marketing_template = MockTemplate(
+        name="Template Marketing",
+        department=TemplateDepartment.MARKETING,
+        prompt_template="Você é um especialista em marketing digital."
+    )
+    
+    sales_template = MockTemplate(
+        name="Template Vendas",
+        department=TemplateDepartment.SALES,
+        prompt_template="Você é um especialista em vendas B2B."
+    )
+    
+    # Criar registros de agentes
+    supervisor_record = MockAgent(
+        name="Supervisor",
+        type=AgentType.SUPERVISOR,
+        template=supervisor_template
+    )
+    
+    marketing_record = MockAgent(
+        name="Marketing",
+        type=AgentType.MARKETING,
+        template=marketing_template,
+        user_id=supervisor_record.user_id
+    )
+    
+    sales_record = MockAgent(
+        name="Vendas",
+        type=AgentType.SALES,
+        template=sales_template,
+        user_id=supervisor_record.user_id
+    )
+    
+    return SimpleNamespace(
+        supervisor=supervisor_record,
+        marketing=marketing_record,
+        sales=sales_record
+    )
+
+@pytest.fixture
+def multi_agent_env(department_records, mcp_mocks):
+    """Banco simulado, conversa e instâncias dos agentes novos por teste."""
+    db = MockDB()
+    
+    # Adicionar ao "banco de dados"
+    db.add(department_records.supervisor)
+    db.add(department_records.marketing)
+    db.add(department_records.sales)
+    
+    # Criar conversa
+    conversation = MockConversation(agent_id=department_records.supervisor.id)
+    db.add(conversation)
+    
+    # Criar instâncias dos agentes
+    agent_kwargs = {"mcp_formatter": mcp_mocks.formatter, "mcp_processor": mcp_mocks.processor}
+    
+    return SimpleNamespace(
+        db=db,
+        conversation=conversation,
+        supervisor=SupervisorAgent(db, department_records.supervisor, **agent_kwargs),
+        marketing_agent=TestBaseAgent(db, department_records.marketing, **agent_kwargs),
+        sales_agent=TestBaseAgent(db, department_records.sales, **agent_kwargs)
+    )
 
 # Teste de integração entre diferentes tipos de agentes
-class TestMultiAgentIntegration(unittest.TestCase):
+class TestMultiAgentIntegration:
     """Testes de integração entre múltiplos agentes"""
     
-    def setUp(self):
-        self.db = MockDB()
-        
-        # Configurar mocks para MCP
-        self.mcp_formatter = MockMCPFormatter()
-        self.mcp_processor = MockMCPProcessor()
-        
-        # Criar templates para os diferentes tipos de agentes
-        self.supervisor_template = MockTemplate(
-            name="Template Supervisor",
-            department=TemplateDepartment.SUPERVISOR,
-            prompt_template="Você é um agente supervisor que coordena outros agentes."
-        )
-        
-        self.marketing_template = MockTemplate(
-            name="Template Marketing",
-            department=TemplateDepartment.MARKETING,
-            prompt_template="Você é um especialista em marketing digital."
-        )
-        
-        self.sales_template = MockTemplate(
-            name="Template Vendas",
-            department=TemplateDepartment.SALES,
-            prompt_template="Você é um especialista em vendas B2B."
-        )
-        
-        # Criar registros de agentes
-        self.supervisor_record = MockAgent(
-            name="Supervisor",
-            type=AgentType.SUPERVISOR,
-            template=self.supervisor_template
-        )
-        
-        self.marketing_record = MockAgent(
-            name="Marketing",
-            type=AgentType.MARKETING,
-            template=self.marketing_template,
-            user_id=self.supervisor_record.user_id
-        )
-        
-        self.sales_record = MockAgent(
-            name="Vendas",
-            type=AgentType.SALES,
-            template=self.sales_template,
-            user_id=self.supervisor_record.user_id
-        )
-        
-        # Adicionar ao "banco de dados"
-        self.db.add(self.supervisor_record)
-        self.db.add(self.marketing_record)
-        self.db.add(self.sales_record)
-        
-        # Criar conversa
-        self.conversation = MockConversation(
-            agent_id=self.supervisor_record.id
-        )
-        self.db.add(self.conversation)
-        
-        # Criar instâncias dos agentes
-        self.supervisor = SupervisorAgent(
-            self.db, 
-            self.supervisor_record,
-            mcp_formatter=self.mcp_formatter,
-            mcp_processor=self.mcp_processor
-        )
-        
-        self.marketing_agent = TestBaseAgent(
-            self.db, 
-            self.marketing_record,
-            mcp_formatter=self.mcp_formatter,
-            mcp_processor=self.mcp_processor
-        )
-        
-        self.sales_agent = TestBaseAgent(
-            self.db, 
-            self.sales_record,
-            mcp_formatter=self.mcp_formatter,
-            mcp_processor=self.mcp_processor
-        )
-    
-    async def test_supervisor_delegation(self):
+    @pytest.mark.asyncio(loop_scope="module")
+    @pytest.mark.parametrize("message, expected_department", [
+        ("Precisamos uma estratégia para as redes sociais da empresa", "marketing"),
+        ("Como podemos aumentar as vendas e melhorar a conversão de leads?", "sales"),
+    ], ids=["marketing", "sales"])
+    async def test_supervisor_delegation(self, multi_agent_env, message, expected_department):
         """Testa a capacidade do supervisor de delegar tarefas aos agentes corretos"""
-        # 1. Mensagem relacionada a marketing
-        marketing_message = "Precisamos uma estratégia para as redes sociais da empresa"
-        
-        # O supervisor deve identificar que esta é uma tarefa de marketing
-        response = await self.supervisor.process_message(
-            conversation_id=self.conversation.id,
-            message=marketing_message
-        )
-        
-        # Verificar se o supervisor identificou o departamento correto
-        dept = self.supervisor._determine_department(marketing_message, {})
-        self.assertEqual(dept, "marketing")
+        supervisor = multi_agent_env.supervisor
         
-        # 2. Mensagem relacionada a vendas
-        sales_message = "Como podemos aumentar as vendas e melhorar a conversão de leads?"
-        
-        # O supervisor deve identificar que esta é uma tarefa de vendas
-        response = await self.supervisor.process_message(
-            conversation_id=self.conversation.id,
-            message=sales_message
+        # O supervisor processa a mensagem do departamento correspondente
+        await supervisor.process_message(
+            conversation_id=multi_agent_env.conversation.id,
+            message=message
         )
         
         # Verificar se o supervisor identificou o departamento correto
-        dept = self.supervisor._determine_department(sales_message, {})
-        self.assertEqual(dept, "sales")
+        assert supervisor._determine_department(message, {}) == expected_department
     
-    async def test_departmental_agent_responses(self):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_departmental_agent_responses(self, multi_agent_env):
         """Testa se os agentes departamentais respondem de acordo com sua especialidade"""
-        # Mensagem de marketing
+        # Mensagens de marketing e de vendas, cada uma para o agente do seu departamento
         marketing_message = "Como podemos melhorar nossa presença nas redes sociais?"
-        
-        # Processar com o agente de marketing
-        marketing_response = await self.marketing_agent.process_message(
-            conversation_id=self.conversation.id,
-            message=marketing_message
-        )
-        
-        # Mensagem de vendas
         sales_message = "Como podemos fechar mais negócios este mês?"
         
-        # Processar com o agente de vendas
-        sales_response = await self.sales_agent.process_message(
-            conversation_id=self.conversation.id,
-            message=sales_message
+        # Os agentes são independentes, então processam em paralelo
+        marketing_response, sales_response = await asyncio.gather(
+            multi_agent_env.marketing_agent.process_message(
+                conversation_id=multi_agent_env.conversation.id,
+                message=marketing_message
+            ),
+            multi_agent_env.sales_agent.process_message(
+                conversation_id=multi_agent_env.conversation.id,
+                message=sales_message
+            )
         )
         
         # Verificar se ambos geraram respostas
-        self.assertIn("message", marketing_response)
-        self.assertIn("message", sales_response)
+        assert "message" in marketing_response
+        assert "message" in sales_response
         
         # Nas implementações reais, verificaríamos a especialização das respostas
-
-# Executar os testes
-if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
@@ -10,29 +10,31 @@ async def test_llm_integration():
     print(f"Connecting to LLM server at: {LLM_SERVER_URL}")
     print(f"Timeout set to: {LLM_SERVER_TIMEOUT} seconds")
     
-    async with httpx.AsyncClient(timeout=LLM_SERVER_TIMEOUT) as client:
+    async with httpx.AsyncClient(
+        timeout=LLM_SERVER_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=4)
+    ) as client:
         try:
-            # Health check test
-            print("\nTesting health endpoint...")
-            health = await client.get(f"{LLM_SERVER_URL}/health")
+            # Health, generation and models requests are independent; issue them together
+            print("\nTesting health, text generation and models endpoints...")
+            health, response, models_response = await asyncio.gather(
+                client.get(f"{LLM_SERVER_URL}/health"),
+                client.post(
+                    f"{LLM_SERVER_URL}/generate",
+                    json={
+                        "prompt": "O que é um sistema ERP inteligente?",
+                        "model_id": "llama",
+                        "max_tokens": 100
+                    }
+                ),
+                client.get(f"{LLM_SERVER_URL}/models")
+            )
+            
             print(f"Status de saúde: {health.json()}")
             
-            # Text generation test
-            print("\nTesting text generation...")
-            response = await client.post(
-                f"{LLM_SERVER_URL}/generate",
-                json={
-                    "prompt": "O que é um sistema ERP inteligente?",
-                    "model_id": "llama",
-                    "max_tokens": 100
-                }
-            )
             result = response.json()
             print(f"Resposta do LLM: {result['text']}")
             
-            # Models test
-            print("\nTesting models endpoint...")
-            models_response = await client.get(f"{LLM_SERVER_URL}/models")
             print(f"Models disponíveis: {json.dumps(models_response.json(), indent=2)}")
             
             print("\n✅ Testes básicos completados com sucesso!")
@@ -1,16 +1,9 @@
 # app/tests/test_mcp.py
-import os
-import sys
-import asyncio
 import json
 from typing import Dict, Any
 
-# Configura path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-sys.path.append(parent_dir)
-
 # Para ter uma sessão de DB para teste
+from sqlalchemy.orm import joinedload
 from app.db.database import SessionLocal
 from app.models.agent import Agent, AgentType
 from app.models.conversation import Conversation, ConversationStatus
@@ -26,21 +19,16 @@ async def test_mcp_formatter():
     
     # Criar dados simulados para teste
     with SessionLocal() as db:
-        # Buscar um agente existente para teste
-        agent = db.query(Agent).first()
+        # Buscar um agente com conversa (e o template usado no prompt) numa única consulta
+        row = db.query(Agent, Conversation).join(
+            Conversation, Conversation.agent_id == Agent.id
+        ).options(joinedload(Agent.template)).first()
         
-        if not agent:
-            print("Nenhum agente encontrado para teste.")
+        if not row:
+            print("Nenhum agente com conversa encontrado para teste.")
             return False
         
-        # Buscar uma conversa existente
-        conversation = db.query(Conversation).filter(
-            Conversation.agent_id == agent.id
-        ).first()
-        
-        if not conversation:
-            print("Nenhuma conversa encontrada para teste.")
-            return False
+        agent, conversation = row
         
         # Formatar o contexto
         context = formatter.format_conversation_context(
@@ -107,4 +95,5 @@ async def run_all_tests():
     print(f"Processor: {'Passou' if processor_result else 'Falhou'}")
 
 if __name__ == "__main__":
-    asyncio.run(run_all_tests())
\ No newline at end of file
+    from app.tests.fixtures.runner import run_async
+    run_async(run_all_tests())
\ No newline at end of file
@@ -1,17 +1,10 @@
 # app/tests/test_templates.py
 import unittest
 import asyncio
-import os
-import sys
 from typing import Dict, Any, List
 import uuid
 from datetime import datetime
 
-# Adicionar diretório raiz ao path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-sys.path.append(parent_dir)
-
 # Importar componentes para teste
 from app.templates.base import TemplateManager
 from app.templates.marketing import get_default_marketing_templates